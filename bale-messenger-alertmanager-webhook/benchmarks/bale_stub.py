@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Local stand-in for the Bale bot API, used by the benchmarks.
+
+Answers every ``/bot<token>/<method>`` POST with a Telegram-style
+``{"ok": true, "result": {"message_id": N}}`` body. ``--connect-delay`` is
+slept once per new TCP connection to model the TLS handshake with
+tapi.bale.ai, ``--latency`` (plus up to ``--jitter``) once per request.
+``--rate-limit-ratio`` and ``--error-ratio`` answer that share of requests
+with a 429 (carrying ``retry_after``) or a 502 instead.
+"""
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class BaleStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.stats["connections"] += 1
+        if self.server.connect_delay:
+            time.sleep(self.server.connect_delay)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        data = self.rfile.read(length)
+        server = self.server
+        server.stats["requests"] += 1
+
+        delay = server.latency + random.uniform(0, server.jitter)  # nosec B311
+        if delay:
+            time.sleep(delay)
+
+        roll = random.random()  # nosec B311 - fault injection, not crypto
+        if roll < server.rate_limit_ratio:
+            server.stats["rate_limited"] += 1
+            self._reply(429, {
+                "ok": False,
+                "error_code": 429,
+                "description": "Too Many Requests",
+                "parameters": {"retry_after": server.retry_after},
+            })
+            return
+        if roll < server.rate_limit_ratio + server.error_ratio:
+            server.stats["server_errors"] += 1
+            self._reply(502, {"ok": False, "error_code": 502, "description": "Bad Gateway"})
+            return
+
+        message_id = next(server.message_ids)
+        if server.deliveries is not None:
+            server.deliveries.append((time.time(), message_id, json.loads(data or b"{}")))
+        self._reply(200, {"ok": True, "result": {"message_id": message_id}})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BaleStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, connect_delay=0.0, jitter=0.0,
+                 rate_limit_ratio=0.0, error_ratio=0.0, retry_after=1, record=False):
+        super().__init__(address, BaleStubHandler)
+        self.latency = latency
+        self.connect_delay = connect_delay
+        self.jitter = jitter
+        self.rate_limit_ratio = rate_limit_ratio
+        self.error_ratio = error_ratio
+        self.retry_after = retry_after
+        self.message_ids = itertools.count(1)
+        self.stats = {"connections": 0, "requests": 0, "rate_limited": 0, "server_errors": 0}
+        # (received_at, message_id, payload) of every accepted message
+        self.deliveries = [] if record else None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stub(host="127.0.0.1", port=0, **kwargs):
+    """Start the stub in a background thread and return the server"""
+    server = BaleStubServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--connect-delay", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--error-ratio", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    server = BaleStubServer(
+        (args.host, args.port),
+        latency=args.latency,
+        connect_delay=args.connect_delay,
+        jitter=args.jitter,
+        rate_limit_ratio=args.rate_limit_ratio,
+        error_ratio=args.error_ratio,
+        retry_after=args.retry_after,
+    )
+    print(f"Bale stub listening on {server.url}")
+    server.serve_forever()
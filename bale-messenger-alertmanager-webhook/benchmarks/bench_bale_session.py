@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Compare Bale send throughput: one connection per message vs pooled session.
+
+Starts benchmarks/bale_stub.py in a subprocess and pushes the same payload
+through ``requests.post`` (the old code path) and through
+``services.bale_service.send_message`` from a pool of sender greenlets.
+
+    python benchmarks/bench_bale_session.py --messages 1000 --concurrency 4
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import gevent
+from gevent.pool import Pool
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            gevent.sleep(0.05)
+    raise RuntimeError("Bale stub did not start")
+
+
+def run(send, messages, concurrency):
+    pool = Pool(concurrency)
+    payload = {"chat_id": "bench", "text": "🔴 ALERT: Benchmark\n" + "x" * 300}
+    start = time.perf_counter()
+    for _ in range(messages):
+        pool.spawn(send, payload)
+    pool.join()
+    return messages / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.005,
+                        help="stub response latency in seconds")
+    parser.add_argument("--connect-delay", type=float, default=0.02,
+                        help="stub per-connection delay modelling TLS setup")
+    args = parser.parse_args()
+
+    port = free_port()
+    stub = subprocess.Popen([
+        sys.executable, os.path.join(HERE, "bale_stub.py"),
+        "--port", str(port),
+        "--latency", str(args.latency),
+        "--connect-delay", str(args.connect_delay),
+    ])
+    try:
+        wait_for_port(port)
+
+        os.environ["BALE_API_URL"] = f"http://127.0.0.1:{port}"
+        os.environ["BALE_TOKEN"] = "bench"
+        os.environ.setdefault("BALE_POOL_SIZE", str(args.concurrency))
+        from config import BALE_URL
+        from services.bale_service import send_message
+
+        before = run(
+            lambda payload: requests.post(BALE_URL, json=payload),
+            args.messages,
+            args.concurrency,
+        )
+        after = run(send_message, args.messages, args.concurrency)
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    print(f"messages={args.messages} concurrency={args.concurrency} "
+          f"latency={args.latency}s connect_delay={args.connect_delay}s")
+    print(f"per-request connection : {before:8.1f} msgs/sec")
+    print(f"pooled session         : {after:8.1f} msgs/sec")
+    print(f"speedup                : {after / before:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
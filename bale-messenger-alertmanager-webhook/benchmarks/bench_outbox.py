@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""/alerting latency for each OUTBOX_FSYNC policy versus no outbox.
+
+Every policy runs in a fresh interpreter (config is read at import) against
+an outbox in ``--dir``, which should be on the same kind of disk as the
+production volume. Sender workers are replaced by a no-op, so alerts are
+acked right after they were queued, like with a fast Bale.
+
+    python benchmarks/bench_outbox.py --dir /data --requests 200
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+POLICIES = ("none", "off", "batch", "always")
+
+
+def run_policy(policy, sizes, requests):
+    """Child process: time /alerting for one policy, prints JSON"""
+    from gevent import monkey
+
+    monkey.patch_all()
+    sys.path.insert(0, os.path.dirname(HERE))
+    sys.path.insert(0, HERE)
+
+    import gevent
+    import main
+    from bench_render import make_payload
+
+    for route in main.router:
+        route.queue.handler = lambda alerts: None
+    client = main.app.test_client()
+
+    results = {}
+    for size in sizes:
+        payload = make_payload(size)
+        timings = []
+        for n in range(requests):
+            # Fresh fingerprints so nothing is skipped as a duplicate
+            for i, alert in enumerate(payload["alerts"]):
+                alert["fingerprint"] = f"{size}-{n}-{i}"
+            body = json.dumps(payload).encode("utf-8")
+            start = time.perf_counter()
+            resp = client.post("/alerting", data=body, content_type="application/json")
+            timings.append((time.perf_counter() - start) * 1000)
+            assert resp.status_code == 202, resp.status_code
+            gevent.sleep(0)
+        timings.sort()
+        results[size] = {
+            "p50": statistics.median(timings),
+            "p99": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        }
+    print(json.dumps(results))
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1,10,100")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--dir", default="", help="directory for the outbox file")
+    parser.add_argument("--policy", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sizes = [int(n) for n in args.sizes.split(",")]
+
+    if args.policy:
+        run_policy(args.policy, sizes, args.requests)
+        return
+
+    workdir = tempfile.mkdtemp(dir=args.dir or None)
+    rows = {}
+    try:
+        run_all(args, rows, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.requests} requests per size, milliseconds p50 / p99")
+    print(f"{'alerts':>7} " + " ".join(f"{policy:>17}" for policy in POLICIES))
+    for size in sizes:
+        cells = [rows[policy][str(size)] for policy in POLICIES]
+        print(f"{size:>7} " + " ".join(
+            f"{cell['p50']:8.3f} /{cell['p99']:7.3f}" for cell in cells
+        ))
+
+
+def run_all(args, rows, workdir):
+    for policy in POLICIES:
+        env = dict(
+            os.environ,
+            BALE_TOKEN="bench",
+            BALE_CHAT_ID="bench",
+            LOG_LEVEL="WARNING",
+            DEDUP_TTL_SECONDS="0",
+            ALERT_QUEUE_SIZE="1000000",
+            OUTBOX_PATH="" if policy == "none" else os.path.join(workdir, f"{policy}.db"),
+            OUTBOX_FSYNC="batch" if policy == "none" else policy,
+        )
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--policy", policy,
+             "--sizes", args.sizes, "--requests", str(args.requests)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        rows[policy] = json.loads(out.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Per-alert message render cost on a synthetic Alertmanager payload.
+
+Compares the previous inline f-string rendering (uncached timestamp parsing
+plus an unconditional ``json.dumps(indent=4)`` of the batch for the debug
+log) with the precompiled templates in services/render_service.py.
+
+    python benchmarks/bench_render.py --alerts 1000 --repeat 20
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.render_service import (
+    MessageRenderer,
+    load_templates,
+    format_time_tehran,
+    get_severity_emoji,
+)
+
+TEHRAN = timezone(timedelta(hours=3, minutes=30))
+
+
+def make_payload(count):
+    """Alerts of a storm: few alertnames and start times, many pods"""
+    alerts = []
+    for i in range(count):
+        alerts.append({
+            "status": "firing" if i % 4 else "resolved",
+            "fingerprint": f"{i:016x}",
+            "labels": {
+                "alertname": f"KubePodCrashLooping{i % 5}",
+                "namespace": f"team-{i % 20}",
+                "pod": f"app-{i}-7d9c8b6f5-x2k4z",
+                "severity": ("critical", "warning", "info")[i % 3],
+            },
+            "annotations": {
+                "summary": "Pod is crash looping.",
+                "description": f"Pod team-{i % 20}/app-{i} is restarting 3 times / 10 minutes.",
+            },
+            "startsAt": f"2024-05-01T10:{i % 6:02d}:00.123456789Z",
+            "endsAt": "0001-01-01T00:00:00Z" if i % 4 else "2024-05-01T11:00:00Z",
+        })
+    return {"alerts": alerts}
+
+
+def legacy_format_time(iso_time):
+    try:
+        dt = datetime.fromisoformat(iso_time.replace("Z", "+00:00"))
+        return dt.astimezone(TEHRAN).strftime("%Y-%m-%d %H:%M:%S IRST")
+    except Exception:
+        return "N/A"
+
+
+def legacy_render(alert):
+    labels = alert.get("labels", {})
+    annotations = alert.get("annotations", {})
+    alertname = labels.get("alertname", "N/A")
+    namespace = labels.get("namespace", "N/A")
+    pod = labels.get("pod", "N/A")
+    severity = labels.get("severity", "none")
+    status = alert.get("status", "N/A")
+    starts_at = legacy_format_time(alert.get("startsAt", ""))
+    ends_at = legacy_format_time(alert.get("endsAt", ""))
+    if status.lower() == "firing" or ends_at in [
+        "1970-01-01 00:00:00 IRST", "0001-01-01 00:00:00 IRST", "N/A",
+    ]:
+        ends_at = "-"
+    emoji = get_severity_emoji(severity, status)
+    summary = annotations.get("summary", "No summary provided")
+    description = annotations.get("description", "No description provided")
+    if status.lower() == "firing":
+        return (
+            f"{emoji} ALERT: {alertname}\n"
+            f"🧩 Namespace: {namespace}\n"
+            f"📦 Pod: {pod}\n"
+            f"⚙️ Severity: {severity.upper()}\n"
+            f"⚡ Status: {status.upper()}\n"
+            f"🕒 Started: {starts_at}\n"
+            f"🕒 Ended: {ends_at}\n\n"
+            f"📝 Summary: {summary}\n"
+            f"💬 Description: {description}"
+        )
+    return (
+        f"🟢 ALERT RESOLVED: {alertname}\n"
+        f"🕒 Started: {starts_at}\n"
+        f"🕒 Ended: {ends_at}\n"
+        f"✅ Status: {status.upper()}"
+    )
+
+
+def legacy_batch(payload):
+    json.dumps(payload, indent=4)
+    return [legacy_render(alert) for alert in payload["alerts"]]
+
+
+def bench(fn, payload, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(payload)
+        best = min(best, time.perf_counter() - start)
+    return best / len(payload["alerts"]) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = make_payload(args.alerts)
+    renderer = MessageRenderer(load_templates(""), 50)
+
+    def templated_batch(payload):
+        return [renderer.render(alert) for alert in payload["alerts"]]
+
+    def templated_cold(payload):
+        format_time_tehran.cache_clear()
+        return templated_batch(payload)
+
+    assert legacy_batch(payload) == templated_batch(payload)
+
+    legacy = bench(legacy_batch, payload, args.repeat)
+    cold = bench(templated_cold, payload, args.repeat)
+    warm = bench(templated_batch, payload, args.repeat)
+
+    print(f"alerts={args.alerts} repeat={args.repeat} (best run, per alert)")
+    print(f"inline f-strings + debug json.dumps : {legacy:7.2f} µs")
+    print(f"templates, cold timestamp cache     : {cold:7.2f} µs")
+    print(f"templates, warm timestamp cache     : {warm:7.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
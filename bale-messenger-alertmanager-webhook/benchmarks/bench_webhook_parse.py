@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Parse + dispatch time of /alerting for 10/100/1,000-alert batches.
+
+Drives the Flask app in-process with its test client, once with the stdlib
+json parser and once with orjson (when installed). Sender workers are
+replaced by a no-op so only the webhook itself is measured.
+
+    python benchmarks/bench_webhook_parse.py --repeat 50
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+os.environ.setdefault("BALE_TOKEN", "bench")
+os.environ.setdefault("BALE_CHAT_ID", "bench")
+os.environ["DEDUP_TTL_SECONDS"] = "0"
+os.environ["ALERT_QUEUE_SIZE"] = "1000000"
+os.environ["LOG_LEVEL"] = "WARNING"
+
+import main  # noqa: E402
+from bench_render import make_payload  # noqa: E402
+from services import json_service  # noqa: E402
+
+
+def bench(client, body, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        resp = client.post("/alerting", data=body, content_type="application/json")
+        best = min(best, time.perf_counter() - start)
+        assert resp.status_code == 202, resp.status_code
+    return best * 1000
+
+
+def bench_parse(loads, body, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loads(body)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    for route in main.router:
+        route.queue.handler = lambda alerts: None
+    client = main.app.test_client()
+
+    backends = [("json", json.loads)]
+    if json_service.orjson is not None:
+        backends.append(("orjson", json_service.orjson.loads))
+
+    print(f"best of {args.repeat}, milliseconds: parse only / full request")
+    print(f"{'alerts':>7} {'bytes':>9} "
+          + " ".join(f"{name:>19}" for name, _ in backends))
+    for size in (int(n) for n in args.sizes.split(",")):
+        body = json.dumps(make_payload(size)).encode("utf-8")
+        row = []
+        for _, loads in backends:
+            main.loads = loads
+            row.append((bench_parse(loads, body, args.repeat), bench(client, body, args.repeat)))
+        print(f"{size:>7} {len(body):>9} "
+              + " ".join(f"{parse:9.3f} /{full:8.3f}" for parse, full in row))
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Alert storm load test against /alerting with a local Bale stub.
+
+Starts the stub (optionally injecting latency, 429s and 5xx), starts
+main.py pointed at it unless ``--url`` is given, and posts Alertmanager
+batches with a configurable firing/resolved mix and duplicate rate. Prints
+one JSON document with webhook p50/p99, end-to-end delivery latency (POST to
+the stub receiving the message) and messages/sec, so runs can be diffed.
+
+    python benchmarks/loadtest.py --alerts 5000 --batch-size 100 \\
+        --resolved-ratio 0.3 --duplicate-ratio 0.2 --latency 0.05 \\
+        --rate-limit-ratio 0.01 --error-ratio 0.01 --output run.json
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from bale_stub import start_stub  # noqa: E402
+
+POD_RE = re.compile(r"loadtest-(\d+)")
+
+
+# ===============================
+# 🔹 Workload
+# ===============================
+
+def make_alert(run, n, status, starts_at, ends_at="0001-01-01T00:00:00Z"):
+    return {
+        "status": status,
+        "fingerprint": f"{run}-{n:08x}",
+        "labels": {
+            "alertname": f"LoadTest{n % 10}",
+            "namespace": f"load-{n % 5}",
+            "pod": f"loadtest-{n}",
+            "severity": ("critical", "warning", "info")[n % 3],
+        },
+        "annotations": {
+            "summary": "Synthetic load test alert.",
+            "description": f"Alert {n} of load test run {run}.",
+        },
+        "startsAt": starts_at,
+        "endsAt": ends_at,
+    }
+
+
+def build_batches(args, rng):
+    """Return the batches to post and the number of messages Bale should get"""
+    run = uuid.uuid4().hex[:8]
+    starts_at = "2024-05-01T10:00:00Z"
+    # Alerts are only resolved once their FIRING batch has surely been posted
+    holdback = 2 * args.concurrency
+
+    batches, fired, resolvable, pending = [], [], [], []
+    expected = 0
+    n = 0
+    total = 0
+    while total < args.alerts:
+        batch = []
+        for _ in range(min(args.batch_size, args.alerts - total)):
+            roll = rng.random()
+            if roll < args.duplicate_ratio and fired:
+                batch.append(make_alert(run, rng.choice(fired), "firing", starts_at))
+            elif roll < args.duplicate_ratio + args.resolved_ratio and resolvable:
+                i = resolvable.pop(rng.randrange(len(resolvable)))
+                batch.append(make_alert(run, i, "resolved", starts_at, "2024-05-01T11:00:00Z"))
+                expected += 1
+            else:
+                batch.append(make_alert(run, n, "firing", starts_at))
+                pending.append((len(batches), n))
+                n += 1
+                expected += 1
+        batches.append(batch)
+        total += len(batch)
+        while pending and pending[0][0] <= len(batches) - holdback:
+            fired.append(pending[0][1])
+            resolvable.append(pending.pop(0)[1])
+    return batches, expected
+
+
+# ===============================
+# 🔹 Webhook process
+# ===============================
+
+def start_webhook(stub_url, log_path):
+    """Run main.py against the stub, other settings come from the environment"""
+    env = dict(
+        os.environ,
+        BALE_API_URL=stub_url,
+        BALE_TOKEN=os.environ.get("BALE_TOKEN", "loadtest"),
+        BALE_CHAT_ID=os.environ.get("BALE_CHAT_ID", "loadtest"),
+        LOG_LEVEL=os.environ.get("LOG_LEVEL", "WARNING"),
+    )
+    with open(log_path, "ab") as log:
+        proc = subprocess.Popen(
+            [sys.executable, os.path.join(os.path.dirname(HERE), "main.py")],
+            env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            requests.get("http://127.0.0.1:5000/healthz", timeout=1)
+            return proc, "http://127.0.0.1:5000/alerting"
+        except requests.RequestException:
+            time.sleep(0.1)
+    proc.terminate()
+    raise SystemExit("webhook did not come up on port 5000")
+
+
+# ===============================
+# 🔹 Reporting
+# ===============================
+
+def scrape_dropped(url):
+    """bale_alerts_dropped_total of the webhook, summed per reason"""
+    dropped = {}
+    try:
+        text = requests.get(url.rsplit("/", 1)[0] + "/metrics", timeout=5).text
+    except requests.RequestException:
+        return None
+    for line in text.splitlines():
+        if line.startswith("bale_alerts_dropped_total{"):
+            reason = re.search(r'reason="([^"]*)"', line).group(1)
+            dropped[reason] = dropped.get(reason, 0) + int(float(line.rsplit(" ", 1)[1]))
+    return dropped
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = sorted(values)
+
+    def pick(q):
+        return round(values[min(len(values) - 1, int(q * len(values)))], 3)
+
+    return {
+        "p50": pick(0.50),
+        "p99": pick(0.99),
+        "max": round(values[-1], 3),
+        "count": len(values),
+    }
+
+
+def delivery_latencies(deliveries, posted):
+    """Match stub deliveries back to the POST of the alerts they carry"""
+    members = {}
+    latencies = []
+    for received_at, message_id, payload in sorted(deliveries, key=lambda d: d[0]):
+        reply_to = payload.get("reply_to_message_id")
+        status = "resolved" if reply_to else "firing"
+        ids = [int(i) for i in POD_RE.findall(payload.get("text", ""))]
+        if not ids and reply_to:
+            ids = members.get(reply_to, [])
+        if status == "firing":
+            members[message_id] = ids
+        for i in ids:
+            sent_at = posted.get((i, status))
+            if sent_at is not None:
+                latencies.append((received_at - sent_at) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--url",
+        help="existing /alerting URL whose BALE_API_URL points at http://127.0.0.1:8081; "
+             "default starts main.py against an ephemeral stub",
+    )
+    parser.add_argument("--alerts", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--resolved-ratio", type=float, default=0.3)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--error-ratio", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--drain-timeout", type=float, default=120)
+    parser.add_argument("--idle-timeout", type=float, default=15)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--webhook-log", default=os.devnull, help="where main.py logs go")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    stub = start_stub(
+        port=0 if args.url is None else 8081,
+        latency=args.latency,
+        jitter=args.jitter,
+        rate_limit_ratio=args.rate_limit_ratio,
+        error_ratio=args.error_ratio,
+        retry_after=args.retry_after,
+        record=True,
+    )
+    proc, url = (None, args.url) if args.url else start_webhook(stub.url, args.webhook_log)
+
+    batches, expected = build_batches(args, rng)
+    posted = {}
+    webhook_ms = []
+    statuses = {}
+    local = threading.local()
+    lock = threading.Lock()
+
+    def post(batch):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        body = json.dumps({"alerts": batch})
+        sent_at = time.time()
+        with lock:
+            for alert in batch:
+                key = (int(alert["labels"]["pod"].split("-")[1]), alert["status"])
+                posted.setdefault(key, sent_at)
+        start = time.perf_counter()
+        resp = session.post(url, data=body, headers={"Content-Type": "application/json"})
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            webhook_ms.append(elapsed)
+            statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+    try:
+        first_post = time.time()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            list(pool.map(post, batches))
+        posted_all = time.time()
+
+        # Wait for the expected messages, or until the stub has seen no
+        # request for --idle-timeout seconds (alerts were dropped)
+        deadline = time.monotonic() + args.drain_timeout
+        seen, idle_since = -1, time.monotonic()
+        while len(stub.deliveries) < expected and time.monotonic() < deadline:
+            if stub.stats["requests"] != seen:
+                seen, idle_since = stub.stats["requests"], time.monotonic()
+            elif time.monotonic() - idle_since > args.idle_timeout:
+                break
+            time.sleep(0.1)
+        # Catch stragglers such as extra digest replies
+        time.sleep(0.5)
+        dropped = scrape_dropped(url)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(10)
+
+    deliveries = list(stub.deliveries)
+    last = max((d[0] for d in deliveries), default=posted_all)
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "batches": len(batches),
+        "alerts_posted": sum(len(b) for b in batches),
+        "webhook_status": {str(k): v for k, v in sorted(statuses.items())},
+        "webhook_latency_ms": percentiles(webhook_ms),
+        "requests_per_sec": round(len(batches) / max(posted_all - first_post, 1e-9), 1),
+        "messages_expected": expected,
+        "messages_delivered": len(deliveries),
+        "messages_per_sec": round(len(deliveries) / max(last - first_post, 1e-9), 1),
+        "e2e_latency_ms": percentiles(delivery_latencies(deliveries, posted)),
+        "alerts_dropped": dropped,
+        "stub": dict(stub.stats),
+    }
+    out = json.dumps(report, indent=2)
+    print(out)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(out + "\n")
+
+
+if __name__ == "__main__":
+    main()
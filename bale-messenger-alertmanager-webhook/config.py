@@ -0,0 +1,148 @@
+import os
+import json
+
+# ===============================
+# 🔹 Bale Configuration
+# ===============================
+
+TOKEN = os.getenv("BALE_TOKEN", "")
+CHANNEL = os.getenv("BALE_CHAT_ID", "")
+BALE_API_URL = os.getenv("BALE_API_URL", "https://tapi.bale.ai")
+BALE_URL = f"{BALE_API_URL}/bot{TOKEN}/sendMessage"
+BALE_EDIT_URL = f"{BALE_API_URL}/bot{TOKEN}/editMessageText"
+
+# ===============================
+# 🔹 Webhook, Logging and Messages
+# ===============================
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Largest /alerting request body accepted, larger batches get 413
+MAX_BODY_BYTES = int(os.getenv("MAX_BODY_BYTES", str(10 * 1024 * 1024)))
+
+# Alerts dispatched before the webhook yields to the sender greenlets
+DISPATCH_YIELD_EVERY = int(os.getenv("DISPATCH_YIELD_EVERY", "100"))
+
+# Directory with <name>.tmpl files overriding the built-in message templates
+MESSAGE_TEMPLATES_DIR = os.getenv("MESSAGE_TEMPLATES_DIR", "")
+
+# ===============================
+# 🔹 Shutdown
+# ===============================
+
+# Seconds /readyz fails before the webhook stops taking batches, so
+# Kubernetes removes the pod from the Service first
+SHUTDOWN_DELAY_SECONDS = float(os.getenv("SHUTDOWN_DELAY_SECONDS", "5"))
+
+# Total seconds from SIGTERM until queued alerts are given up on; keep it
+# below the pod's terminationGracePeriodSeconds
+SHUTDOWN_TIMEOUT_SECONDS = float(os.getenv("SHUTDOWN_TIMEOUT_SECONDS", "25"))
+
+# ===============================
+# 🔹 Bale HTTP Session
+# ===============================
+
+# Keep-alive connections kept open to the Bale API
+BALE_POOL_SIZE = int(os.getenv("BALE_POOL_SIZE", "10"))
+
+# Seconds to wait for the TCP/TLS connect and for the response
+BALE_CONNECT_TIMEOUT = float(os.getenv("BALE_CONNECT_TIMEOUT", "3"))
+BALE_READ_TIMEOUT = float(os.getenv("BALE_READ_TIMEOUT", "10"))
+
+# ===============================
+# 🔹 Rate Limiting and Retries
+# ===============================
+
+# Bale calls per second allowed by the client-side token bucket, 0 disables it
+BALE_RATE_LIMIT = float(os.getenv("BALE_RATE_LIMIT", "10"))
+BALE_RATE_BURST = int(os.getenv("BALE_RATE_BURST", "20"))
+
+# In-place retries of a call that hit 429, 5xx or a connection error
+BALE_MAX_RETRIES = int(os.getenv("BALE_MAX_RETRIES", "3"))
+
+# Exponential backoff bounds in seconds, Bale's retry_after wins if longer
+BALE_BACKOFF_BASE = float(os.getenv("BALE_BACKOFF_BASE", "0.5"))
+BALE_BACKOFF_MAX = float(os.getenv("BALE_BACKOFF_MAX", "60"))
+
+# Alerts parked for a later retry once the in-place retries are exhausted
+RETRY_QUEUE_SIZE = int(os.getenv("RETRY_QUEUE_SIZE", "500"))
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "5"))
+
+# ===============================
+# 🔹 Message Store
+# ===============================
+
+# SQLite file holding the fingerprint -> message_id map, empty keeps it in memory
+MESSAGE_STORE_PATH = os.getenv("MESSAGE_STORE_PATH", "")
+
+# Seconds a FIRING message stays eligible for a RESOLVED reply
+MESSAGE_TTL_SECONDS = int(os.getenv("MESSAGE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Entries kept in the in-memory LRU in front of the store
+MESSAGE_CACHE_SIZE = int(os.getenv("MESSAGE_CACHE_SIZE", "10000"))
+
+# ===============================
+# 🔹 Outbox
+# ===============================
+
+# SQLite file alerts are written to before /alerting answers and removed from
+# once Bale acked them, empty disables the outbox
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", "")
+
+# "always": fsync every alert, "batch": one fsync per webhook request,
+# "off": no fsync (survives a pod restart, not a node crash)
+OUTBOX_FSYNC = os.getenv("OUTBOX_FSYNC", "batch").lower()
+
+# ===============================
+# 🔹 Deduplication
+# ===============================
+
+# Seconds a (fingerprint, status, startsAt) notification is remembered, 0 disables it
+DEDUP_TTL_SECONDS = int(os.getenv("DEDUP_TTL_SECONDS", str(24 * 3600)))
+
+# Maximum notifications remembered by the dedup cache
+DEDUP_MAX_ENTRIES = int(os.getenv("DEDUP_MAX_ENTRIES", "50000"))
+
+# ===============================
+# 🔹 Digest Mode
+# ===============================
+
+# Rewrite the FIRING message in place on resolve instead of replying to it
+# (single-alert messages only, ignored in digest mode)
+EDIT_MODE = os.getenv("EDIT_MODE", "false").lower() == "true"
+
+# Group alerts by alertname/namespace/severity and send one message per group
+DIGEST_MODE = os.getenv("DIGEST_MODE", "false").lower() == "true"
+
+# Seconds to keep collecting alerts into a group, 0 groups within one batch only
+DIGEST_WINDOW_SECONDS = float(os.getenv("DIGEST_WINDOW_SECONDS", "10"))
+
+# Pods listed in a digest message before it is truncated
+DIGEST_MAX_ITEMS = int(os.getenv("DIGEST_MAX_ITEMS", "50"))
+
+# ===============================
+# 🔹 Delivery Queue
+# ===============================
+
+# Total number of alerts that may wait for delivery across all workers
+ALERT_QUEUE_SIZE = int(os.getenv("ALERT_QUEUE_SIZE", "1000"))
+
+# Concurrent Bale sends, one fingerprint is never sent by two at once
+SENDER_WORKERS = int(os.getenv("SENDER_WORKERS", "4"))
+
+# ===============================
+# 🔹 Routing
+# ===============================
+
+# Extra chats, each with its own queue and workers; unmatched alerts use the
+# default route (BALE_CHAT_ID / SENDER_WORKERS / ALERT_QUEUE_SIZE), e.g.
+# [{"name": "critical", "chat_id": "123", "match": {"severity": "critical"},
+#   "workers": 4, "queue_size": 500, "rate_limit": 0}]
+BALE_ROUTES = json.loads(os.getenv("BALE_ROUTES", "[]"))
+
+# Every sender worker needs its own keep-alive connection, otherwise a busy
+# route could hold all of them and stall the others
+BALE_POOL_SIZE = max(
+    BALE_POOL_SIZE,
+    SENDER_WORKERS + sum(int(route.get("workers", 1)) for route in BALE_ROUTES),
+)
@@ -1,179 +1,506 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+from gevent import monkey
+
+monkey.patch_all()
+
 from flask import Flask, request
+import gevent
 from gevent.pywsgi import WSGIServer
+from werkzeug.exceptions import RequestEntityTooLarge
 import json
+import signal
 import socket
-import requests
-from datetime import datetime, timezone, timedelta
 import logging
-import os
-# ===============================
-# 🔹 Bale Configuration
-# ===============================
-
-TOKEN = os.getenv("BALE_TOKEN", "")
-CHANNEL = os.getenv("BALE_CHAT_ID", "")
-BALE_URL = f"https://tapi.bale.ai/bot{TOKEN}/sendMessage"
-
-if not TOKEN or not CHANNEL:
-    logger.error("Missing Bale configuration (BALE_TOKEN or BALE_CHAT_ID)")
+import time
+
+from config import (
+    TOKEN,
+    CHANNEL,
+    MESSAGE_STORE_PATH,
+    MESSAGE_TTL_SECONDS,
+    MESSAGE_CACHE_SIZE,
+    OUTBOX_PATH,
+    OUTBOX_FSYNC,
+    DEDUP_TTL_SECONDS,
+    DEDUP_MAX_ENTRIES,
+    DIGEST_MODE,
+    EDIT_MODE,
+    DIGEST_WINDOW_SECONDS,
+    DIGEST_MAX_ITEMS,
+    MESSAGE_TEMPLATES_DIR,
+    SHUTDOWN_DELAY_SECONDS,
+    SHUTDOWN_TIMEOUT_SECONDS,
+    LOG_LEVEL,
+    MAX_BODY_BYTES,
+    DISPATCH_YIELD_EVERY,
+    ALERT_QUEUE_SIZE,
+    SENDER_WORKERS,
+    BALE_MAX_RETRIES,
+    RETRY_QUEUE_SIZE,
+    RETRY_MAX_ATTEMPTS,
+    BALE_ROUTES,
+)
+from services.bale_service import TokenBucket, send_message, edit_message, backoff_delay
+from services.dedup_service import DedupCache, dedup_key
+from services.delivery_service import DeliveryQueue, alert_fingerprint
+from services.digest_service import DigestBuffer
+from services.exceptions import BaleAPIError, DeliveryError, OutboxError
+from services.json_service import JSON_BACKEND, loads
+from services.metrics_service import (
+    metrics_response,
+    message_edits_total,
+    outbox_replayed_total,
+    resolved_without_message_total,
+    webhook_request_duration_seconds,
+    webhook_batch_size,
+    alerts_received_total,
+    webhook_rejected_total,
+)
+from services.outbox_service import build_outbox
+from services.render_service import MessageRenderer, load_templates
+from services.routing_service import build_router
+from services.store_service import build_message_store
 
 # ===============================
 # 🔹 Logging Setup
 # ===============================
 logging.basicConfig(
-    level=logging.INFO,
+    level=LOG_LEVEL,
     format="[%(asctime)s] [%(levelname)s] %(message)s",
     datefmt="%Y-%m-%d %H:%M:%S",
 )
 logger = logging.getLogger("alert-webhook")
 
-app = Flask(__name__)
-
-# Temporary memory for holding message_id of alerts
-alert_messages = {}
+if not TOKEN or not CHANNEL:
+    logger.error("Missing Bale configuration (BALE_TOKEN or BALE_CHAT_ID)")
 
-# Tehran timezone (UTC+3:30)
-TEHRAN = timezone(timedelta(hours=3, minutes=30))
+app = Flask(__name__)
+# Also caps chunked bodies that come without a Content-Length
+app.config["MAX_CONTENT_LENGTH"] = MAX_BODY_BYTES
 
+# message_id of FIRING alerts, used to thread the RESOLVED reply
+alert_messages = build_message_store(
+    MESSAGE_STORE_PATH, MESSAGE_TTL_SECONDS, MESSAGE_CACHE_SIZE
+)
 
-def format_time_tehran(iso_time):
-    """Convert ISO time to Tehran local time"""
-    try:
-        dt = datetime.fromisoformat(iso_time.replace("Z", "+00:00"))
-        dt_tehran = dt.astimezone(TEHRAN)
-        return dt_tehran.strftime("%Y-%m-%d %H:%M:%S IRST")
-    except Exception:
-        return "N/A"
-
-
-def get_severity_emoji(severity, status):
-    """Choose emoji color based on severity and status"""
-    severity = (severity or "").lower()
-    status = (status or "").lower()
-
-    if status == "resolved":
-        return "🟢"
-    if severity == "critical":
-        return "🔴"
-    elif severity == "warning":
-        return "🟡"
-    elif severity == "info":
-        return "🔵"
-    elif severity == "none":
-        return "⚪"
-    else:
-        return "⚫"
+# Alerts accepted but not yet delivered, replayed after a restart
+outbox = build_outbox(OUTBOX_PATH, OUTBOX_FSYNC)
 
+# Message texts are rendered from templates compiled once at startup
+renderer = MessageRenderer(load_templates(MESSAGE_TEMPLATES_DIR), DIGEST_MAX_ITEMS)
 
-def send_to_bale(alert):
-    """Send alert message to Bale and handle replies on resolve"""
-    labels = alert.get("labels", {})
-    annotations = alert.get("annotations", {})
+# A digest message covers several alerts, so it is never edited for one of them
+if EDIT_MODE and DIGEST_MODE:
+    logger.warning("EDIT_MODE is ignored in digest mode, RESOLVED alerts are sent as replies")
+edit_mode = EDIT_MODE and not DIGEST_MODE
 
-    alertname = labels.get("alertname", "N/A")
-    namespace = labels.get("namespace", "N/A")
-    pod = labels.get("pod", "N/A")
-    severity = labels.get("severity", "none")
-    status = alert.get("status", "N/A")
 
-    starts_at = format_time_tehran(alert.get("startsAt", ""))
-    ends_at = format_time_tehran(alert.get("endsAt", ""))
+def edit_resolved(alert, route, msg_id):
+    """Rewrite the FIRING message in place, returns False to fall back to a reply"""
+    alertname = alert.get("labels", {}).get("alertname", "N/A")
+    text = renderer.render(alert, "edited")
 
-    # If still firing, clear the end time
-    if status.lower() == "firing" or ends_at in [
-        "1970-01-01 00:00:00 IRST",
-        "0001-01-01 00:00:00 IRST",
-        "N/A",
-    ]:
-        ends_at = "-"
+    payload = {"chat_id": route.chat_id, "message_id": msg_id, "text": text}
 
-    emoji = get_severity_emoji(severity, status)
-    summary = annotations.get("summary", "No summary provided")
-    description = annotations.get("description", "No description provided")
+    try:
+        edit_message(payload, limiter=route.limiter)
+        message_edits_total.labels(result="edited").inc()
+        logger.info(f"Edited FIRING message of {alertname} to RESOLVED")
+        return True
+    except BaleAPIError as e:
+        if e.retryable:
+            logger.error(f"Error editing message of {alertname}: {e}")
+            raise DeliveryError(str(e), [alert])
+        # Too old, deleted or not editable by the bot
+        message_edits_total.labels(result="fallback").inc()
+        logger.warning(f"Could not edit message of {alertname}, replying instead: {e}")
+        return False
+
+
+def send_to_bale(alert, route):
+    """Send alert message to the route's chat and handle replies on resolve"""
+    alertname = alert.get("labels", {}).get("alertname", "N/A")
+    status = alert.get("status", "N/A")
 
-    fingerprint = alert.get("fingerprint", f"{alertname}-{namespace}-{pod}")
+    fingerprint = alert_fingerprint(alert)
 
     if status.lower() == "firing":
-        text = (
-            f"{emoji} ALERT: {alertname}\n"
-            f"🧩 Namespace: {namespace}\n"
-            f"📦 Pod: {pod}\n"
-            f"⚙️ Severity: {severity.upper()}\n"
-            f"⚡ Status: {status.upper()}\n"
-            f"🕒 Started: {starts_at}\n"
-            f"🕒 Ended: {ends_at}\n\n"
-            f"📝 Summary: {summary}\n"
-            f"💬 Description: {description}"
-        )
+        text = renderer.render(alert)
 
-        payload = {"chat_id": CHANNEL, "text": text}
+        payload = {"chat_id": route.chat_id, "text": text}
 
         try:
-            resp = requests.post(BALE_URL, json=payload)
-            data = resp.json()
-            logger.info(f"Sent FIRING alert [{alertname}] - Status: {resp.status_code}")
+            data = send_message(payload, limiter=route.limiter)
+            logger.info(f"Sent FIRING alert [{alertname}] to route {route.name}")
 
             msg_id = data.get("result", {}).get("message_id")
             if msg_id:
-                alert_messages[fingerprint] = msg_id
+                alert_messages.set(fingerprint, msg_id)
                 logger.debug(f"Stored message_id for {fingerprint}")
-        except Exception as e:
+        except BaleAPIError as e:
             logger.error(f"Error sending alert to Bale: {e}")
+            if e.retryable:
+                raise DeliveryError(str(e), [alert])
+            forget_seen([alert])
 
     elif status.lower() == "resolved":
         msg_id = alert_messages.get(fingerprint)
         if not msg_id:
+            reason = alert_messages.miss_reason(fingerprint)
+            resolved_without_message_total.labels(reason=reason).inc()
             logger.warning(
-                f"No message_id found for resolved alert {alertname}, skipping reply."
+                f"No message_id found for resolved alert {alertname} "
+                f"({reason}), skipping reply."
             )
             return
 
-        text = (
-            f"🟢 ALERT RESOLVED: {alertname}\n"
-            f"🕒 Started: {starts_at}\n"
-            f"🕒 Ended: {ends_at}\n"
-            f"✅ Status: {status.upper()}"
-        )
+        if edit_mode and edit_resolved(alert, route, msg_id):
+            alert_messages.delete(fingerprint)
+            return
 
-        payload = {"chat_id": CHANNEL, "text": text, "reply_to_message_id": msg_id}
+        text = renderer.render(alert)
+
+        payload = {"chat_id": route.chat_id, "text": text, "reply_to_message_id": msg_id}
 
         try:
-            resp = requests.post(BALE_URL, json=payload)
+            send_message(payload, status="resolved", limiter=route.limiter)
             logger.info(f"Sent RESOLVED reply for {alertname}")
-        except Exception as e:
+        except BaleAPIError as e:
             logger.error(f"Error sending resolved reply: {e}")
+            if e.retryable:
+                raise DeliveryError(str(e), [alert])
+            forget_seen([alert])
+
+        alert_messages.delete(fingerprint)
+
+
+def send_digest(alerts, route):
+    """Send one message for a group of alerts sharing alertname/namespace/severity"""
+    first = alerts[0]
+    alertname = first.get("labels", {}).get("alertname", "N/A")
+    status = first.get("status", "N/A")
+
+    if status.lower() == "firing":
+        text = renderer.render_digest(alerts)
+
+        payload = {"chat_id": route.chat_id, "text": text}
+
+        try:
+            data = send_message(payload, limiter=route.limiter)
+            logger.info(f"Sent FIRING digest [{alertname}] with {len(alerts)} alerts")
+
+            msg_id = data.get("result", {}).get("message_id")
+            if msg_id:
+                for alert in alerts:
+                    alert_messages.set(alert_fingerprint(alert), msg_id)
+        except BaleAPIError as e:
+            logger.error(f"Error sending digest to Bale: {e}")
+            if e.retryable:
+                raise DeliveryError(str(e), alerts)
+            forget_seen(alerts)
+
+    elif status.lower() == "resolved":
+        # Members may belong to different FIRING digests, reply to each of them
+        threads = {}
+        for alert in alerts:
+            fingerprint = alert_fingerprint(alert)
+            msg_id = alert_messages.get(fingerprint)
+            if not msg_id:
+                reason = alert_messages.miss_reason(fingerprint)
+                resolved_without_message_total.labels(reason=reason).inc()
+                logger.warning(
+                    f"No message_id found for resolved alert {alertname} "
+                    f"({reason}), skipping reply."
+                )
+                continue
+            threads.setdefault(msg_id, []).append(alert)
+
+        failed = []
+        for msg_id, members in threads.items():
+            text = renderer.render_digest(members)
+
+            payload = {"chat_id": route.chat_id, "text": text, "reply_to_message_id": msg_id}
+
+            try:
+                send_message(payload, status="resolved", limiter=route.limiter)
+                logger.info(f"Sent RESOLVED digest reply for {alertname}")
+            except BaleAPIError as e:
+                logger.error(f"Error sending resolved digest reply: {e}")
+                if e.retryable:
+                    failed.extend(members)
+                    continue
+                forget_seen(members)
+
+            for alert in members:
+                alert_messages.delete(alert_fingerprint(alert))
+
+        if failed:
+            raise DeliveryError("Resolved digest reply failed", failed)
+
+
+def deliver(alerts, route):
+    """Sender worker entry point: a single alert or a digest group"""
+    if len(alerts) == 1:
+        send_to_bale(alerts[0], route)
+    else:
+        send_digest(alerts, route)
+
+
+def forget_seen(alerts):
+    """Let Alertmanager's next repeat of alerts that were not delivered through"""
+    if dedup_cache is not None:
+        for alert in alerts:
+            dedup_cache.forget(dedup_key(alert))
+
+
+def enqueue_digest(route, alerts, key):
+    if not route.queue.enqueue(alerts, key):
+        logger.warning(
+            f"Delivery queue of route {route.name} full, "
+            f"dropped digest of {len(alerts)} alerts"
+        )
+
+
+def start_route(route):
+    """Give a route its own delivery queue, sender workers and digest buffer"""
+    route.queue = DeliveryQueue(
+        lambda alerts: deliver(alerts, route),
+        route.queue_size,
+        route.workers,
+        retry_size=RETRY_QUEUE_SIZE,
+        retry_attempts=RETRY_MAX_ATTEMPTS,
+        # Continue the backoff sequence where the in-place retries stopped
+        retry_delay=lambda attempt: backoff_delay(BALE_MAX_RETRIES + attempt),
+        name=route.name,
+        outbox=outbox,
+        on_drop=forget_seen,
+    )
+    route.queue.start()
+
+    if DIGEST_MODE:
+        route.digest = DigestBuffer(
+            lambda alerts, key: enqueue_digest(route, alerts, key),
+            DIGEST_WINDOW_SECONDS,
+        )
 
-        del alert_messages[fingerprint]
+    # Per-chat limit on top of the global BALE_RATE_LIMIT
+    if route.rate_limit > 0:
+        route.limiter = TokenBucket(route.rate_limit, route.rate_burst)
+
+
+# Alerts are delivered by per-route sender greenlets so Alertmanager is
+# answered at once and a slow or throttled chat cannot hold up the others
+router = build_router(BALE_ROUTES, CHANNEL, SENDER_WORKERS, ALERT_QUEUE_SIZE)
+for route in router:
+    start_route(route)
+
+# Repeated and HA-duplicated notifications are skipped before they are queued
+dedup_cache = DedupCache(DEDUP_TTL_SECONDS, DEDUP_MAX_ENTRIES) if DEDUP_TTL_SECONDS > 0 else None
+
+
+def replay_outbox():
+    """Re-queue the alerts a previous run accepted but did not deliver"""
+    alerts = outbox.pending_alerts()
+    if not alerts:
+        return
+    logger.info(f"Replaying {len(alerts)} alerts from the outbox")
+    for alert in alerts:
+        # Alertmanager's repeats of a replayed alert are duplicates
+        if dedup_cache is not None:
+            dedup_cache.seen(dedup_key(alert))
+        # Wait for queue room, sends still go through the rate limiters
+        router.route(alert).queue.enqueue([alert], alert_fingerprint(alert), block=True)
+        outbox_replayed_total.inc()
+    logger.info("Outbox replay finished")
+
+
+if outbox is not None:
+    gevent.spawn(replay_outbox)
+
+
+# Pre-resolved label children, looked up once per alert
+RECEIVED = {
+    status: alerts_received_total.labels(status=status)
+    for status in ("firing", "resolved", "other")
+}
+
+
+def dispatch(alert):
+    """Hand one alert to its route's digest buffer or delivery queue.
+
+    Returns False when the alert had to be dropped.
+    """
+    route = router.route(alert)
+    if route.digest is not None:
+        route.digest.add(alert)
+        return True
+
+    return route.queue.enqueue([alert], alert_fingerprint(alert))
+
+
+# Shutdown state: readiness fails first, then new batches are refused
+ready = True
+accepting = True
+requests_in_flight = 0
 
 
 @app.route("/alerting", methods=["POST"])
+@webhook_request_duration_seconds.time()
 def webhook():
-    """Receive alert from Alertmanager"""
+    """Receive alert from Alertmanager and queue it for delivery"""
+    global requests_in_flight
+
+    if not accepting:
+        # Alertmanager retries 5xx, by then against another pod
+        webhook_rejected_total.labels(reason="shutting_down").inc()
+        return "Shutting Down", 503
+
+    requests_in_flight += 1
     try:
-        prometheus_data = json.loads(request.data)
-        logger.info("Received new alert batch")
-        logger.debug(json.dumps(prometheus_data, indent=4))
+        return handle_batch()
+    finally:
+        requests_in_flight -= 1
 
-        for alert in prometheus_data.get("alerts", []):
-            send_to_bale(alert)
 
-        return "OK", 200
+def handle_batch():
+    try:
+        # Reject oversized batches from the Content-Length header, before reading
+        if request.content_length and request.content_length > MAX_BODY_BYTES:
+            raise RequestEntityTooLarge()
+
+        prometheus_data = loads(request.get_data(cache=False))
+        logger.info("Received new alert batch")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps(prometheus_data, indent=4))
+
+        alerts = prometheus_data.get("alerts", [])
+        webhook_batch_size.observe(len(alerts))
+
+        accepted = []
+        for alert in alerts:
+            RECEIVED.get((alert.get("status") or "").lower(), RECEIVED["other"]).inc()
+            if dedup_cache is None or not dedup_cache.seen(dedup_key(alert)):
+                accepted.append(alert)
+
+        # Persist before answering, Alertmanager will not send them again
+        if outbox is not None:
+            outbox.add(accepted)
+
+        dropped = 0
+        for i, alert in enumerate(accepted, 1):
+            if not dispatch(alert):
+                dropped += 1
+
+            # Let sender greenlets run while a large batch is processed
+            if i % DISPATCH_YIELD_EVERY == 0:
+                gevent.sleep(0)
+
+        if DIGEST_MODE and DIGEST_WINDOW_SECONDS <= 0:
+            for route in router:
+                route.digest.flush_all()
+
+        if dropped:
+            logger.warning(f"Delivery queue full, dropped {dropped} alerts")
+
+        return "Accepted", 202
+    except OutboxError as e:
+        # Answer with an error so Alertmanager retries the whole batch
+        forget_seen(accepted)
+        webhook_rejected_total.labels(reason="outbox_error").inc()
+        logger.error(f"Outbox write failed: {e}")
+        return "Service Unavailable", 503
+    except RequestEntityTooLarge:
+        webhook_rejected_total.labels(reason="too_large").inc()
+        logger.warning(f"Rejected alert batch larger than {MAX_BODY_BYTES} bytes")
+        return "Payload Too Large", 413
+    except ValueError as e:
+        webhook_rejected_total.labels(reason="invalid_json").inc()
+        logger.error(f"Invalid alert batch: {e}")
+        return "Bad Request", 400
     except Exception as e:
         logger.error(f"Webhook error: {e}")
         return "Error", 500
 
+
 @app.route("/healthz", methods=["GET"])
 def health():
+    """Liveness: the process is up, also while it drains"""
+    return "OK", 200
+
+
+@app.route("/readyz", methods=["GET"])
+def readiness():
+    """Readiness: fails as soon as shutdown starts"""
+    if not ready:
+        return "Draining", 503
     return "OK", 200
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return metrics_response()
+
+
+# ===============================
+# 🔹 Graceful shutdown
+# ===============================
+
+shutdown_deadline = None
+
+
+def on_signal(server):
+    global shutdown_deadline
+
+    if shutdown_deadline is None:
+        shutdown_deadline = time.monotonic() + SHUTDOWN_TIMEOUT_SECONDS
+        gevent.spawn(shutdown, server)
+
+
+def shutdown(server):
+    """SIGTERM: leave the Service, finish open batches, stop the server"""
+    global ready, accepting
+
+    ready = False
+    logger.info(f"Shutdown requested, draining for up to {SHUTDOWN_TIMEOUT_SECONDS}s")
+    gevent.sleep(SHUTDOWN_DELAY_SECONDS)
+
+    accepting = False
+    while requests_in_flight and time.monotonic() < shutdown_deadline:
+        gevent.sleep(0.05)
+    server.stop(timeout=0)
+
+
+def drain(deadline):
+    """Deliver what is still queued, then flush the persistent stores"""
+    if DIGEST_MODE:
+        for route in router:
+            route.digest.flush_all()
+
+    pending = sum(route.queue.drain(deadline) for route in router)
+    if pending:
+        kept = "kept in the outbox" if outbox is not None else "lost"
+        logger.warning(f"Shutdown deadline reached, {pending} undelivered alerts {kept}")
+    else:
+        logger.info("All queued alerts delivered")
+
+    alert_messages.close()
+    if outbox is not None:
+        outbox.close()
+
+
 if __name__ == "__main__":
     hostname = socket.gethostname()
     IP = socket.gethostbyname(hostname)
     PORT = 5000
-    logger.info(f"Webhook running on http://{IP}:{PORT}/alerting")
-    WSGIServer(("0.0.0.0", PORT), app).serve_forever()
+    logger.info(f"Webhook running on http://{IP}:{PORT}/alerting (json: {JSON_BACKEND})")
+    server = WSGIServer(("0.0.0.0", PORT), app)
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        gevent.signal_handler(signum, on_signal, server)
+
+    server.serve_forever()
+    drain(shutdown_deadline or time.monotonic() + SHUTDOWN_TIMEOUT_SECONDS)
+    logger.info("Shutdown complete")
 
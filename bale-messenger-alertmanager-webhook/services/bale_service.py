@@ -0,0 +1,221 @@
+import random
+import time
+from threading import Lock
+
+import gevent
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+
+from config import (
+    BALE_URL,
+    BALE_EDIT_URL,
+    BALE_POOL_SIZE,
+    BALE_CONNECT_TIMEOUT,
+    BALE_READ_TIMEOUT,
+    BALE_RATE_LIMIT,
+    BALE_RATE_BURST,
+    BALE_MAX_RETRIES,
+    BALE_BACKOFF_BASE,
+    BALE_BACKOFF_MAX,
+)
+from services.exceptions import BaleAPIError
+from services.metrics_service import (
+    bale_throttled_seconds_total,
+    bale_send_retries_total,
+    bale_send_duration_seconds,
+    bale_sends_in_flight,
+)
+
+# ===============================
+# 🔹 Shared HTTP session (lazy init)
+# ===============================
+
+_session = None
+_lock = Lock()
+
+
+def get_session():
+    """Return the shared keep-alive session used for every Bale API call"""
+    global _session
+
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=BALE_POOL_SIZE,
+                    pool_block=True,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+
+    return _session
+
+
+# ===============================
+# 🔹 Rate limiting
+# ===============================
+
+class TokenBucket:
+    """Client-side limiter: ``rate`` calls per second with bursts of ``burst``.
+
+    Callers reserve a token and sleep until it becomes available, so waiting
+    greenlets are served in arrival order. A rate of 0 disables the limiter
+    but :meth:`pause` (used for Bale's ``retry_after``) still applies.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = Lock()
+
+    def acquire(self):
+        """Take one token, returns the seconds spent waiting for it"""
+        with self.lock:
+            now = time.monotonic()
+            wait = max(0.0, self.blocked_until - now)
+            if self.rate > 0:
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                self.tokens -= 1
+                if self.tokens < 0:
+                    wait = max(wait, -self.tokens / self.rate)
+
+        if wait > 0:
+            gevent.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """Hold every caller back for ``seconds``"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+rate_limiter = TokenBucket(BALE_RATE_LIMIT, BALE_RATE_BURST)
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Jittered exponential backoff, never shorter than Bale's retry_after"""
+    delay = min(BALE_BACKOFF_MAX, BALE_BACKOFF_BASE * 2 ** attempt)
+    delay = random.uniform(delay / 2, delay)  # nosec B311 - jitter, not crypto
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def _retry_after(resp, data):
+    value = (data.get("parameters") or {}).get("retry_after")
+    if value is None:
+        value = resp.headers.get("Retry-After")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# ===============================
+# 🔹 Bale API calls
+# ===============================
+
+def _post(url, payload, limiter=None):
+    throttled = limiter.acquire() if limiter is not None else 0
+    throttled += rate_limiter.acquire()
+    if throttled:
+        bale_throttled_seconds_total.inc(throttled)
+
+    try:
+        resp = get_session().post(
+            url,
+            json=payload,
+            timeout=(BALE_CONNECT_TIMEOUT, BALE_READ_TIMEOUT),
+        )
+    except RequestException as e:
+        raise BaleAPIError(
+            f"Bale request failed: {e}", error_type="connection_error", retryable=True
+        )
+
+    try:
+        data = resp.json()
+    except ValueError:
+        data = {}
+
+    if resp.status_code == 429 or data.get("error_code") == 429:
+        retry_after = _retry_after(resp, data)
+        if retry_after:
+            rate_limiter.pause(retry_after)
+        raise BaleAPIError(
+            "Bale rate limit exceeded",
+            error_type="rate_limited",
+            retryable=True,
+            retry_after=retry_after,
+        )
+
+    if resp.status_code >= 500:
+        raise BaleAPIError(
+            f"Bale server error: {resp.status_code}",
+            error_type="server_error",
+            retryable=True,
+        )
+
+    if resp.status_code >= 400 or data.get("ok") is False:
+        raise BaleAPIError(
+            f"Bale rejected request: {resp.status_code} {data.get('description', '')}",
+            error_type=f"http_{resp.status_code}",
+        )
+
+    return data
+
+
+def send_message(payload, status="firing", limiter=None):
+    """POST a sendMessage payload to Bale, retrying 429/5xx/connection errors.
+
+    Returns the decoded response body, raises BaleAPIError once the retries
+    are exhausted or the request is rejected. ``status`` (firing/resolved)
+    only labels the latency metric. ``limiter`` is an optional per-route
+    TokenBucket applied before the global one.
+    """
+    return _call(BALE_URL, payload, status, limiter)
+
+
+def edit_message(payload, limiter=None):
+    """POST an editMessageText payload to Bale, same retries as send_message"""
+    return _call(BALE_EDIT_URL, payload, "edit", limiter)
+
+
+def _call(url, payload, status, limiter):
+    start = time.perf_counter()
+    outcome = "failed"
+    try:
+        with bale_sends_in_flight.track_inprogress():
+            data = _send_with_retries(url, payload, limiter)
+        outcome = "success"
+        return data
+    except BaleAPIError as e:
+        if not e.retryable:
+            outcome = "rejected"
+        raise
+    finally:
+        bale_send_duration_seconds.labels(status=status, outcome=outcome).observe(
+            time.perf_counter() - start
+        )
+
+
+def _send_with_retries(url, payload, limiter=None):
+    attempt = 0
+    while True:
+        try:
+            return _post(url, payload, limiter)
+        except BaleAPIError as e:
+            if not e.retryable or attempt >= BALE_MAX_RETRIES:
+                raise
+            bale_send_retries_total.labels(reason=e.error_type).inc()
+            gevent.sleep(backoff_delay(attempt, e.retry_after))
+            attempt += 1
@@ -0,0 +1,60 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from services.delivery_service import alert_fingerprint
+from services.metrics_service import dedup_lookups_total, dedup_entries
+
+
+def dedup_key(alert):
+    """Alertmanager repeats and HA peers resend the same (fingerprint, status, startsAt)"""
+    return (
+        alert_fingerprint(alert),
+        (alert.get("status") or "").lower(),
+        alert.get("startsAt", ""),
+    )
+
+
+class DedupCache:
+    """Remembers notifications for ``ttl`` seconds so duplicates can be skipped.
+
+    Entries are kept in insertion order and all share the same TTL, so the
+    oldest entry is always the next to expire and purging is done from the
+    front. The cache never holds more than ``max_entries`` keys.
+    """
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        dedup_entries.set_function(self.__len__)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def seen(self, key):
+        """Return True for a duplicate, otherwise remember the key"""
+        now = time.monotonic()
+        with self.lock:
+            self._purge(now)
+            if key in self.entries:
+                dedup_lookups_total.labels(result="hit").inc()
+                return True
+            self.entries[key] = now + self.ttl
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        dedup_lookups_total.labels(result="miss").inc()
+        return False
+
+    def forget(self, key):
+        """Drop a key, e.g. when its alert could not be queued"""
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def _purge(self, now):
+        while self.entries:
+            key, expires_at = next(iter(self.entries.items()))
+            if expires_at > now:
+                break
+            del self.entries[key]
@@ -0,0 +1,201 @@
+import logging
+import time
+from collections import deque
+
+import gevent
+from gevent.lock import Semaphore
+from gevent.queue import Queue
+
+from services.exceptions import DeliveryError
+from services.metrics_service import (
+    alert_queue_depth,
+    retry_queue_depth,
+    bale_delivery_retries_total,
+    alerts_enqueued_total,
+    alerts_dropped_total,
+    alert_queue_latency_seconds,
+)
+
+logger = logging.getLogger("alert-webhook")
+
+
+def alert_fingerprint(alert):
+    """Return the Alertmanager fingerprint, or a label based fallback"""
+    labels = alert.get("labels", {})
+    return alert.get(
+        "fingerprint",
+        f"{labels.get('alertname', 'N/A')}-{labels.get('namespace', 'N/A')}"
+        f"-{labels.get('pod', 'N/A')}",
+    )
+
+
+class DeliveryQueue:
+    """Bounded in-process queue drained by a pool of sender greenlets.
+
+    Each queued item is a list of alerts that ``handler`` delivers together
+    (a single alert, or a digest group). Items are kept in one FIFO lane per
+    key and ``workers`` greenlets take turns on the lanes, never two on the
+    same one: up to ``workers`` keys are sent concurrently, while the FIRING
+    and RESOLVED notifications of one alert are still sent one after the
+    other. A slow send only holds up later items of its own key.
+
+    When ``handler`` raises DeliveryError the failed alerts are parked in a
+    bounded retry queue and re-delivered after ``retry_delay(attempt)``
+    seconds. While a key has parked alerts, newer items with the same key are
+    parked behind them, so ordering per key still holds.
+
+    With an ``outbox`` an alert is acked in it only once Bale answered for
+    it. Alerts dropped here (queue or retry queue full, retries exhausted)
+    keep their row, so they are replayed on the next start instead of lost.
+
+    ``on_drop`` is called with the alerts of every such drop.
+    """
+
+    def __init__(self, handler, maxsize, workers, retry_size=0, retry_attempts=0,
+                 retry_delay=None, name="default", outbox=None, on_drop=None):
+        self.handler = handler
+        self.on_drop = on_drop
+        self.name = name
+        self.outbox = outbox
+        self.workers = max(1, workers)
+        self.maxsize = max(1, maxsize)
+        self.slots = Semaphore(self.maxsize)
+        self.lanes = {}
+        # Keys with queued items and no worker on them
+        self.runnable = Queue()
+        self.greenlets = []
+        self.retry_size = retry_size
+        self.retry_attempts = retry_attempts
+        self.retry_delay = retry_delay
+        self.parked = {}
+        self.parked_count = 0
+        self.in_flight = 0
+        alert_queue_depth.labels(route=name).set_function(self.qsize)
+        retry_queue_depth.labels(route=name).set_function(lambda: self.parked_count)
+        self.enqueued = alerts_enqueued_total.labels(route=name)
+        self.latency = alert_queue_latency_seconds.labels(route=name)
+
+    def qsize(self):
+        return self.maxsize - self.slots.counter
+
+    def pending(self):
+        """Alerts queued, being sent or parked for a retry"""
+        return self.qsize() + self.in_flight + self.parked_count
+
+    def drain(self, deadline):
+        """Wait until everything queued was handled or ``deadline``
+        (time.monotonic()) passed, returns the alerts still pending"""
+        while self.pending() and time.monotonic() < deadline:
+            gevent.sleep(0.1)
+        return self.pending()
+
+    def start(self):
+        if self.greenlets:
+            return
+        self.greenlets = [gevent.spawn(self._worker) for _ in range(self.workers)]
+        logger.info(f"Started {self.workers} sender workers for route {self.name}")
+
+    def enqueue(self, alerts, key, block=False):
+        """Queue alerts for delivery, returns False when they were dropped.
+
+        With ``block`` the caller waits for room instead (used for replay).
+        """
+        if not self.slots.acquire(blocking=block):
+            alerts_dropped_total.labels(reason="queue_full", route=self.name).inc(len(alerts))
+            self._drop(alerts)
+            return False
+
+        lane = self.lanes.get(key)
+        if lane is None:
+            lane = self.lanes[key] = deque()
+            self.runnable.put(key)
+        lane.append((time.monotonic(), alerts))
+        self.enqueued.inc(len(alerts))
+        return True
+
+    def _worker(self):
+        while True:
+            key = self.runnable.get()
+            lane = self.lanes[key]
+            enqueued_at, alerts = lane.popleft()
+            self.slots.release()
+
+            if key in self.parked:
+                self._park(key, alerts, 0, enqueued_at)
+            else:
+                failed = self._deliver(alerts)
+                if failed:
+                    self._park(key, failed, 1, enqueued_at)
+                else:
+                    self.latency.observe(time.monotonic() - enqueued_at)
+
+            # The lane goes back in line behind the other keys
+            if lane:
+                self.runnable.put(key)
+            else:
+                del self.lanes[key]
+
+    def _deliver(self, alerts):
+        """Run the handler, returns the alerts that should be retried"""
+        failed = None
+        self.in_flight += len(alerts)
+        try:
+            self.handler(alerts)
+        except DeliveryError as e:
+            logger.warning(f"Delivery failed, {len(e.alerts)} alerts to retry: {e}")
+            failed = e.alerts
+        except Exception as e:
+            logger.error(f"Sender worker error: {e}")
+        finally:
+            self.in_flight -= len(alerts)
+
+        if failed:
+            retried = {id(alert) for alert in failed}
+            self._ack([alert for alert in alerts if id(alert) not in retried])
+        else:
+            self._ack(alerts)
+        return failed
+
+    def _ack(self, alerts):
+        if self.outbox is not None:
+            self.outbox.ack(alerts)
+
+    def _drop(self, alerts):
+        if self.on_drop is not None:
+            self.on_drop(alerts)
+
+    def _park(self, key, alerts, attempt, enqueued_at):
+        if self.parked_count + len(alerts) > self.retry_size:
+            alerts_dropped_total.labels(reason="retry_queue_full", route=self.name).inc(len(alerts))
+            logger.error(f"Retry queue full, dropped {len(alerts)} alerts")
+            self._drop(alerts)
+            return
+        self.parked_count += len(alerts)
+        items = self.parked.get(key)
+        if items is None:
+            items = self.parked[key] = deque()
+            gevent.spawn(self._retry, key, items)
+        items.append((attempt, enqueued_at, alerts))
+
+    def _retry(self, key, items):
+        while items:
+            attempt, enqueued_at, alerts = items[0]
+            if attempt:
+                gevent.sleep(self.retry_delay(attempt))
+                bale_delivery_retries_total.inc()
+            items.popleft()
+            self.parked_count -= len(alerts)
+
+            failed = self._deliver(alerts)
+            if not failed:
+                self.latency.observe(time.monotonic() - enqueued_at)
+            elif attempt >= self.retry_attempts:
+                alerts_dropped_total.labels(
+                    reason="retries_exhausted", route=self.name
+                ).inc(len(failed))
+                logger.error(f"Giving up on {len(failed)} alerts after {attempt} retries")
+                self._drop(failed)
+            else:
+                items.appendleft((attempt + 1, enqueued_at, failed))
+                self.parked_count += len(failed)
+        del self.parked[key]
@@ -0,0 +1,58 @@
+import logging
+from threading import Lock
+
+import gevent
+
+logger = logging.getLogger("alert-webhook")
+
+
+def digest_key(alert):
+    """Alerts sharing alertname/namespace/severity end up in one digest"""
+    labels = alert.get("labels", {})
+    return (
+        labels.get("alertname", "N/A"),
+        labels.get("namespace", "N/A"),
+        labels.get("severity", "none"),
+    )
+
+
+class DigestBuffer:
+    """Collects alerts into groups and hands each group to ``flush`` as a list.
+
+    Groups are keyed by status plus :func:`digest_key`. With a window of 0 a
+    group only spans one webhook batch (call :meth:`flush_all` after the
+    batch); otherwise a group is flushed ``window`` seconds after its first
+    alert arrived, so alerts from consecutive batches are merged too.
+    """
+
+    def __init__(self, flush, window):
+        self.flush = flush
+        self.window = window
+        self.groups = {}
+        self.lock = Lock()
+
+    def add(self, alert):
+        key = ((alert.get("status") or "").lower(),) + digest_key(alert)
+        with self.lock:
+            group = self.groups.get(key)
+            if group is None:
+                group = self.groups[key] = []
+                if self.window > 0:
+                    gevent.spawn_later(self.window, self._flush_group, key)
+            group.append(alert)
+
+    def flush_all(self):
+        with self.lock:
+            keys = list(self.groups)
+        for key in keys:
+            self._flush_group(key)
+
+    def _flush_group(self, key):
+        with self.lock:
+            alerts = self.groups.pop(key, None)
+        if not alerts:
+            return
+        try:
+            self.flush(alerts, "/".join(key[1:]))
+        except Exception as e:
+            logger.error(f"Digest flush error: {e}")
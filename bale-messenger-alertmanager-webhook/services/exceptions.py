@@ -0,0 +1,24 @@
+class BaleAPIError(Exception):
+    def __init__(self, message, error_type="unknown", retryable=False, retry_after=None):
+        super().__init__(message)
+        self.error_type = error_type
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.message = message
+
+
+class DeliveryError(Exception):
+    """Raised by a delivery handler with the alerts that should be retried"""
+
+    def __init__(self, message, alerts):
+        super().__init__(message)
+        self.alerts = alerts
+        self.message = message
+
+
+class OutboxError(Exception):
+    """Raised when alerts could not be persisted to the outbox"""
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
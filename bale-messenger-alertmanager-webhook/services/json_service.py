@@ -0,0 +1,20 @@
+import json
+
+# orjson is optional: several times faster on large batches, stdlib otherwise
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+    JSON_BACKEND = "orjson"
+
+    def loads(data):
+        return orjson.loads(data)
+
+else:
+    JSON_BACKEND = "json"
+
+    def loads(data):
+        return json.loads(data)
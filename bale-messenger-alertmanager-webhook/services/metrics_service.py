@@ -0,0 +1,177 @@
+from prometheus_client import Counter
+from prometheus_client import Histogram
+from prometheus_client import Gauge
+from prometheus_client import generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST
+
+
+# ===============================
+# 🔹 Webhook
+# ===============================
+
+webhook_request_duration_seconds = Histogram(
+    "bale_webhook_request_duration_seconds",
+    "Time spent handling an Alertmanager webhook request",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+webhook_batch_size = Histogram(
+    "bale_webhook_batch_size",
+    "Alerts per Alertmanager webhook request",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+
+webhook_rejected_total = Counter(
+    "bale_webhook_rejected_total",
+    "Alertmanager requests rejected before any alert was processed",
+    ["reason"],
+)
+
+alerts_received_total = Counter(
+    "bale_alerts_received_total",
+    "Alerts received from Alertmanager",
+    ["status"],
+)
+
+
+# ===============================
+# 🔹 Delivery Queue
+# ===============================
+
+alert_queue_depth = Gauge(
+    "bale_alert_queue_depth",
+    "Alerts waiting in the delivery queue",
+    ["route"],
+)
+
+alerts_enqueued_total = Counter(
+    "bale_alerts_enqueued_total",
+    "Alerts accepted into the delivery queue",
+    ["route"],
+)
+
+alerts_dropped_total = Counter(
+    "bale_alerts_dropped_total",
+    "Alerts dropped before delivery",
+    ["reason", "route"],
+)
+
+alert_queue_latency_seconds = Histogram(
+    "bale_alert_queue_latency_seconds",
+    "Time from enqueue until the alert has been sent to Bale",
+    ["route"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+
+
+retry_queue_depth = Gauge(
+    "bale_retry_queue_depth",
+    "Alerts parked in the retry queue",
+    ["route"],
+)
+
+
+# ===============================
+# 🔹 Bale API
+# ===============================
+
+bale_throttled_seconds_total = Counter(
+    "bale_throttled_seconds_total",
+    "Time spent waiting for the client-side rate limiter",
+)
+
+bale_send_duration_seconds = Histogram(
+    "bale_send_duration_seconds",
+    "Bale sendMessage/editMessageText latency including throttling and in-place retries",
+    ["status", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+bale_sends_in_flight = Gauge(
+    "bale_sends_in_flight",
+    "Bale sendMessage calls currently in progress",
+)
+
+bale_send_retries_total = Counter(
+    "bale_send_retries_total",
+    "Bale API calls retried in place",
+    ["reason"],
+)
+
+bale_delivery_retries_total = Counter(
+    "bale_delivery_retries_total",
+    "Deliveries re-attempted from the retry queue",
+)
+
+message_edits_total = Counter(
+    "bale_message_edits_total",
+    "RESOLVED alerts handled in edit mode, fallback means a reply was sent",
+    ["result"],
+)
+
+
+# ===============================
+# 🔹 Message Store
+# ===============================
+
+message_store_entries = Gauge(
+    "bale_message_store_entries",
+    "fingerprint -> message_id entries held in memory",
+)
+
+message_store_evictions_total = Counter(
+    "bale_message_store_evictions_total",
+    "Entries removed from the in-memory message store",
+    ["reason"],
+)
+
+resolved_without_message_total = Counter(
+    "bale_resolved_without_message_total",
+    "RESOLVED alerts dropped because no message_id was found",
+    ["reason"],
+)
+
+
+# ===============================
+# 🔹 Outbox
+# ===============================
+
+outbox_entries = Gauge(
+    "bale_outbox_entries",
+    "Alerts persisted in the outbox and not yet acked by Bale",
+)
+
+outbox_write_duration_seconds = Histogram(
+    "bale_outbox_write_duration_seconds",
+    "Time spent persisting the alerts of one webhook request",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+outbox_replayed_total = Counter(
+    "bale_outbox_replayed_total",
+    "Alerts re-queued from the outbox at startup",
+)
+
+
+# ===============================
+# 🔹 Deduplication
+# ===============================
+
+dedup_lookups_total = Counter(
+    "bale_dedup_lookups_total",
+    "Dedup cache lookups, hits are duplicates that were not sent",
+    ["result"],
+)
+
+dedup_entries = Gauge(
+    "bale_dedup_entries",
+    "Notifications remembered by the dedup cache",
+)
+
+
+# ===============================
+# 🔹 Metrics endpoint helper
+# ===============================
+
+def metrics_response():
+    return generate_latest(), 200, {"Content-Type": CONTENT_TYPE_LATEST}
@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from threading import Lock
+
+from services.exceptions import OutboxError
+from services.metrics_service import outbox_entries, outbox_write_duration_seconds
+
+logger = logging.getLogger("alert-webhook")
+
+# Key under which an alert carries its outbox row id while it is in flight
+OUTBOX_ID = "_outbox_id"
+
+# OUTBOX_FSYNC policy -> SQLite synchronous level used for inserts
+FSYNC_POLICIES = {
+    "always": "FULL",
+    "batch": "FULL",
+    "off": "NORMAL",
+}
+
+
+class Outbox:
+    """Write-ahead log of alerts accepted by the webhook but not yet delivered.
+
+    Alerts are inserted before /alerting answers and deleted once Bale acked
+    or rejected them. Alerts the delivery queue dropped keep their row, so
+    whatever is left after an outage, crash or restart is replayed on
+    startup. With ``fsync="always"`` every alert is
+    committed and fsynced on its own, with ``"batch"`` the alerts of one
+    request share a single commit, with ``"off"`` SQLite never waits for the
+    disk. Deletes are never fsynced: losing one only means the alert is sent
+    again after a crash.
+    """
+
+    def __init__(self, path, fsync="batch"):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown OUTBOX_FSYNC policy '{fsync}'")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.fsync = fsync
+        self.synchronous = FSYNC_POLICIES[fsync]
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " alert TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self.lock = Lock()
+        self.pending = self.conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+        outbox_entries.set_function(lambda: self.pending)
+
+    def add(self, alerts):
+        """Persist alerts and tag each with its row id, raises OutboxError"""
+        if not alerts:
+            return
+        start = time.perf_counter()
+        rows = [(json.dumps(alert), time.time()) for alert in alerts]
+        try:
+            with self.lock:
+                if self.fsync == "always":
+                    for alert, row in zip(alerts, rows):
+                        alert[OUTBOX_ID] = self._insert(row)
+                else:
+                    self.conn.execute("BEGIN")
+                    try:
+                        for alert, row in zip(alerts, rows):
+                            alert[OUTBOX_ID] = self._insert(row)
+                        self.conn.execute("COMMIT")
+                    except sqlite3.Error:
+                        self.conn.execute("ROLLBACK")
+                        raise
+                self.pending += len(alerts)
+        except sqlite3.Error as e:
+            for alert in alerts:
+                alert.pop(OUTBOX_ID, None)
+            raise OutboxError(f"Could not persist {len(alerts)} alerts: {e}")
+        finally:
+            outbox_write_duration_seconds.observe(time.perf_counter() - start)
+
+    def _insert(self, row):
+        return self.conn.execute(
+            "INSERT INTO outbox (alert, created_at) VALUES (?, ?)", row
+        ).lastrowid
+
+    def ack(self, alerts):
+        """Remove alerts Bale acked or rejected"""
+        ids = [(alert.pop(OUTBOX_ID),) for alert in alerts if OUTBOX_ID in alert]
+        if not ids:
+            return
+        try:
+            with self.lock:
+                self.conn.execute("PRAGMA synchronous=NORMAL")
+                try:
+                    self.conn.execute("BEGIN")
+                    deleted = self.conn.executemany(
+                        "DELETE FROM outbox WHERE id = ?", ids
+                    ).rowcount
+                    self.conn.execute("COMMIT")
+                except sqlite3.Error:
+                    if self.conn.in_transaction:
+                        self.conn.execute("ROLLBACK")
+                    raise
+                finally:
+                    self.conn.execute(f"PRAGMA synchronous={self.synchronous}")
+                self.pending -= deleted
+        except sqlite3.Error as e:
+            logger.error(f"Could not remove {len(ids)} alerts from the outbox: {e}")
+
+    def pending_alerts(self):
+        """Alerts left by a previous run, oldest first, tagged with their row id"""
+        with self.lock:
+            rows = self.conn.execute("SELECT id, alert FROM outbox ORDER BY id").fetchall()
+        alerts = []
+        for row_id, data in rows:
+            alert = json.loads(data)
+            alert[OUTBOX_ID] = row_id
+            alerts.append(alert)
+        return alerts
+
+    def close(self):
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.close()
+
+
+def build_outbox(path, fsync):
+    """Create the outbox when a path is configured, None otherwise"""
+    if not path:
+        return None
+    outbox = Outbox(path, fsync)
+    logger.info(
+        f"Persisting queued alerts to {path} (fsync: {fsync}, pending: {outbox.pending})"
+    )
+    return outbox
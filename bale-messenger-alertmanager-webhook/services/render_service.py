@@ -0,0 +1,187 @@
+import logging
+import os
+from datetime import datetime, timezone, timedelta
+from functools import lru_cache
+from string import Template
+
+logger = logging.getLogger("alert-webhook")
+
+# Tehran timezone (UTC+3:30)
+TEHRAN = timezone(timedelta(hours=3, minutes=30))
+
+# End times Alertmanager sends for alerts that have not ended yet
+UNSET_END_TIMES = ("1970-01-01 00:00:00 IRST", "0001-01-01 00:00:00 IRST", "N/A")
+
+
+# ===============================
+# 🔹 Message templates
+# ===============================
+
+FIRING_TEMPLATE = (
+    "${emoji} ALERT: ${alertname}\n"
+    "🧩 Namespace: ${namespace}\n"
+    "📦 Pod: ${pod}\n"
+    "⚙️ Severity: ${severity}\n"
+    "⚡ Status: ${status}\n"
+    "🕒 Started: ${starts_at}\n"
+    "🕒 Ended: ${ends_at}\n\n"
+    "📝 Summary: ${summary}\n"
+    "💬 Description: ${description}"
+)
+
+DEFAULT_TEMPLATES = {
+    "firing": FIRING_TEMPLATE,
+    # Edit mode: the FIRING message rewritten once the alert resolved
+    "edited": FIRING_TEMPLATE,
+    "resolved": (
+        "🟢 ALERT RESOLVED: ${alertname}\n"
+        "🕒 Started: ${starts_at}\n"
+        "🕒 Ended: ${ends_at}\n"
+        "✅ Status: ${status}"
+    ),
+    "digest_firing": (
+        "${emoji} ALERT: ${alertname} (${count} alerts)\n"
+        "🧩 Namespace: ${namespace}\n"
+        "⚙️ Severity: ${severity}\n"
+        "⚡ Status: ${status}\n"
+        "🕒 Started: ${starts_at}\n"
+        "📦 Pods:\n${pods}\n\n"
+        "📝 Summary: ${summary}"
+    ),
+    "digest_resolved": (
+        "🟢 ALERT RESOLVED: ${alertname} (${count} alerts)\n"
+        "📦 Pods:\n${pods}\n"
+        "🕒 Ended: ${ends_at}\n"
+        "✅ Status: ${status}"
+    ),
+}
+
+
+def load_templates(directory):
+    """Compile the message templates once, ``<name>.tmpl`` files in
+    ``directory`` override the built-in ones"""
+    templates = {}
+    for name, default in DEFAULT_TEMPLATES.items():
+        source = default
+        path = os.path.join(directory, f"{name}.tmpl") if directory else ""
+        if path and os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                source = f.read().rstrip("\n")
+            logger.info(f"Loaded message template {path}")
+        templates[name] = Template(source)
+    return templates
+
+
+# ===============================
+# 🔹 Formatting helpers
+# ===============================
+
+@lru_cache(maxsize=4096)
+def format_time_tehran(iso_time):
+    """Convert ISO time to Tehran local time.
+
+    Memoized: alerts of one batch mostly share a handful of timestamps.
+    """
+    try:
+        dt = datetime.fromisoformat(iso_time.replace("Z", "+00:00"))
+        dt_tehran = dt.astimezone(TEHRAN)
+        return dt_tehran.strftime("%Y-%m-%d %H:%M:%S IRST")
+    except Exception:
+        return "N/A"
+
+
+def get_severity_emoji(severity, status):
+    """Choose emoji color based on severity and status"""
+    severity = (severity or "").lower()
+    status = (status or "").lower()
+
+    if status == "resolved":
+        return "🟢"
+    if severity == "critical":
+        return "🔴"
+    elif severity == "warning":
+        return "🟡"
+    elif severity == "info":
+        return "🔵"
+    elif severity == "none":
+        return "⚪"
+    else:
+        return "⚫"
+
+
+def format_members(alerts, limit):
+    """Bullet list of the pods in a digest, capped at ``limit``"""
+    lines = [
+        f" • {alert.get('labels', {}).get('pod', 'N/A')}"
+        for alert in alerts[:limit]
+    ]
+    if len(alerts) > limit:
+        lines.append(f" … and {len(alerts) - limit} more")
+    return "\n".join(lines)
+
+
+# ===============================
+# 🔹 Renderer
+# ===============================
+
+class MessageRenderer:
+    """Renders Bale message texts from precompiled templates"""
+
+    def __init__(self, templates, digest_max_items):
+        self.templates = templates
+        self.digest_max_items = digest_max_items
+
+    def render(self, alert, template_name=None):
+        """Text for a single FIRING message or RESOLVED reply, or
+        ``template_name`` (e.g. "edited") filled with the alert"""
+        labels = alert.get("labels", {})
+        annotations = alert.get("annotations", {})
+        status = alert.get("status", "N/A")
+        severity = labels.get("severity", "none")
+
+        ends_at = format_time_tehran(alert.get("endsAt", ""))
+        # If still firing, clear the end time
+        if status.lower() == "firing" or ends_at in UNSET_END_TIMES:
+            ends_at = "-"
+
+        if template_name is None:
+            template_name = "firing" if status.lower() == "firing" else "resolved"
+        return self.templates[template_name].safe_substitute(
+            emoji=get_severity_emoji(severity, status),
+            alertname=labels.get("alertname", "N/A"),
+            namespace=labels.get("namespace", "N/A"),
+            pod=labels.get("pod", "N/A"),
+            severity=severity.upper(),
+            status=status.upper(),
+            starts_at=format_time_tehran(alert.get("startsAt", "")),
+            ends_at=ends_at,
+            summary=annotations.get("summary", "No summary provided"),
+            description=annotations.get("description", "No description provided"),
+        )
+
+    def render_digest(self, alerts):
+        """Text for a FIRING digest or a RESOLVED digest reply"""
+        first = alerts[0]
+        labels = first.get("labels", {})
+        annotations = first.get("annotations", {})
+        status = first.get("status", "N/A")
+        severity = labels.get("severity", "none")
+
+        if status.lower() == "firing":
+            template = self.templates["digest_firing"]
+        else:
+            template = self.templates["digest_resolved"]
+
+        return template.safe_substitute(
+            emoji=get_severity_emoji(severity, status),
+            alertname=labels.get("alertname", "N/A"),
+            namespace=labels.get("namespace", "N/A"),
+            severity=severity.upper(),
+            status=status.upper(),
+            count=len(alerts),
+            pods=format_members(alerts, self.digest_max_items),
+            starts_at=format_time_tehran(min(a.get("startsAt", "") for a in alerts)),
+            ends_at=format_time_tehran(max(a.get("endsAt", "") for a in alerts)),
+            summary=annotations.get("summary", "No summary provided"),
+            description=annotations.get("description", "No description provided"),
+        )
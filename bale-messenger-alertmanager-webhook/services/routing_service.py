@@ -0,0 +1,96 @@
+import logging
+import re
+
+logger = logging.getLogger("alert-webhook")
+
+
+def compile_matcher(label, expr):
+    """Compile one Alertmanager style matcher into a predicate on labels.
+
+    ``"value"`` matches exactly, ``"=~regex"`` / ``"!~regex"`` match the
+    whole label value against a regex, ``"!=value"`` excludes a value. A
+    missing label is treated as an empty string, like Alertmanager does.
+    """
+    expr = str(expr)
+
+    if expr.startswith("=~"):
+        regex = re.compile(expr[2:])
+        return lambda labels: regex.fullmatch(labels.get(label, "")) is not None
+    if expr.startswith("!~"):
+        regex = re.compile(expr[2:])
+        return lambda labels: regex.fullmatch(labels.get(label, "")) is None
+    if expr.startswith("!="):
+        value = expr[2:]
+        return lambda labels: labels.get(label, "") != value
+    if expr.startswith("="):
+        expr = expr[1:]
+    return lambda labels: labels.get(label, "") == expr
+
+
+class Route:
+    """One Bale chat with its own delivery queue, workers and rate limit.
+
+    ``queue``, ``digest`` and ``limiter`` are attached by the app once the
+    route table is built.
+    """
+
+    def __init__(self, name, chat_id, match=None, workers=1, queue_size=100,
+                 rate_limit=0, rate_burst=1):
+        self.name = name
+        self.chat_id = str(chat_id)
+        self.matchers = [compile_matcher(label, expr) for label, expr in (match or {}).items()]
+        self.workers = workers
+        self.queue_size = queue_size
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+        self.queue = None
+        self.digest = None
+        self.limiter = None
+
+    def matches(self, labels):
+        for matcher in self.matchers:
+            if not matcher(labels):
+                return False
+        return True
+
+
+class Router:
+    """First matching route wins, alerts matching no route go to ``default``"""
+
+    def __init__(self, routes, default):
+        self.routes = routes
+        self.default = default
+
+    def __iter__(self):
+        yield from self.routes
+        yield self.default
+
+    def route(self, alert):
+        labels = alert.get("labels", {})
+        for route in self.routes:
+            if route.matches(labels):
+                return route
+        return self.default
+
+
+def build_router(config, default_chat_id, default_workers, default_queue_size):
+    """Build the route table from the BALE_ROUTES list, compiling matchers once"""
+    routes = []
+    for i, entry in enumerate(config):
+        name = entry.get("name") or f"route-{i}"
+        if not entry.get("chat_id"):
+            raise ValueError(f"Route '{name}' has no chat_id")
+        routes.append(Route(
+            name=name,
+            chat_id=entry["chat_id"],
+            match=entry.get("match"),
+            workers=int(entry.get("workers", 1)),
+            queue_size=int(entry.get("queue_size", default_queue_size)),
+            rate_limit=float(entry.get("rate_limit", 0)),
+            rate_burst=int(entry.get("rate_burst", 1)),
+        ))
+        logger.info(f"Loaded route {name} -> chat {entry['chat_id']}")
+
+    default = Route("default", default_chat_id, workers=default_workers,
+                    queue_size=default_queue_size)
+    return Router(routes, default)
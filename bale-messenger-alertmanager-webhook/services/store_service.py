@@ -0,0 +1,197 @@
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from services.metrics_service import (
+    message_store_entries,
+    message_store_evictions_total,
+)
+
+logger = logging.getLogger("alert-webhook")
+
+
+# ===============================
+# 🔹 Persistent backends
+# ===============================
+
+class SQLiteBackend:
+    """fingerprint -> message_id table in a local SQLite file (e.g. on a PVC)"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS alert_messages ("
+            " fingerprint TEXT PRIMARY KEY,"
+            " message_id INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        self.lock = Lock()
+
+    def get(self, fingerprint):
+        """Return (message_id, expires_at) or None"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT message_id, expires_at FROM alert_messages WHERE fingerprint = ?",
+                (fingerprint,),
+            ).fetchone()
+
+    def set(self, fingerprint, message_id, expires_at):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO alert_messages VALUES (?, ?, ?)",
+                (fingerprint, message_id, expires_at),
+            )
+
+    def delete(self, fingerprint):
+        with self.lock:
+            self.conn.execute(
+                "DELETE FROM alert_messages WHERE fingerprint = ?", (fingerprint,)
+            )
+
+    def purge_expired(self, now):
+        with self.lock:
+            return self.conn.execute(
+                "DELETE FROM alert_messages WHERE expires_at <= ?", (now,)
+            ).rowcount
+
+    def close(self):
+        """Fold the WAL back into the database file and close it"""
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.close()
+
+
+# ===============================
+# 🔹 Message store
+# ===============================
+
+class MessageStore:
+    """Maps alert fingerprints to the Bale message_id of their FIRING message.
+
+    Lookups are served from an in-memory LRU bounded to ``max_entries``. When
+    a backend is configured every write goes through to it, and memory misses
+    fall back to it, so the mapping survives restarts. Entries expire ``ttl``
+    seconds after they are stored so alerts that never resolve do not
+    accumulate forever.
+
+    Fingerprints dropped by eviction or expiry are remembered (bounded, keys
+    only) so a later miss can be told apart from a never-seen fingerprint.
+    """
+
+    PURGE_INTERVAL = 300
+
+    def __init__(self, ttl, max_entries, backend=None):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.backend = backend
+        self.entries = OrderedDict()
+        self.dropped = OrderedDict()
+        self.lock = Lock()
+        self.next_purge = time.time() + self.PURGE_INTERVAL
+        message_store_entries.set_function(self.__len__)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, fingerprint):
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(fingerprint)
+            if entry is not None:
+                if entry[1] > now:
+                    self.entries.move_to_end(fingerprint)
+                    return entry[0]
+                del self.entries[fingerprint]
+                self._expire(fingerprint)
+
+        if self.backend is None:
+            return None
+
+        row = self.backend.get(fingerprint)
+        if row is None:
+            return None
+        if row[1] <= now:
+            with self.lock:
+                self._expire(fingerprint)
+            return None
+
+        with self.lock:
+            self._remember(fingerprint, row[0], row[1])
+        return row[0]
+
+    def miss_reason(self, fingerprint):
+        """Why get() missed: "evicted", "expired" or "unknown" (never seen)"""
+        with self.lock:
+            return self.dropped.get(fingerprint, "unknown")
+
+    def set(self, fingerprint, message_id):
+        now = time.time()
+        expires_at = now + self.ttl
+        with self.lock:
+            self.dropped.pop(fingerprint, None)
+            self._remember(fingerprint, message_id, expires_at)
+            purge = now >= self.next_purge
+            if purge:
+                self.next_purge = now + self.PURGE_INTERVAL
+                self._purge_expired(now)
+
+        if self.backend is not None:
+            self.backend.set(fingerprint, message_id, expires_at)
+            if purge:
+                purged = self.backend.purge_expired(now)
+                if purged:
+                    logger.info(f"Purged {purged} expired message_id entries")
+
+    def delete(self, fingerprint):
+        with self.lock:
+            self.entries.pop(fingerprint, None)
+        if self.backend is not None:
+            self.backend.delete(fingerprint)
+
+    def close(self):
+        """Flush the persistent backend, if any, before shutdown"""
+        if self.backend is not None:
+            self.backend.close()
+
+    def _remember(self, fingerprint, message_id, expires_at):
+        self.entries[fingerprint] = (message_id, expires_at)
+        self.entries.move_to_end(fingerprint)
+        while len(self.entries) > self.max_entries:
+            evicted, _ = self.entries.popitem(last=False)
+            message_store_evictions_total.labels(reason="lru").inc()
+            # With a backend the entry is still on disk, nothing was lost
+            if self.backend is None:
+                self._drop(evicted, "evicted")
+
+    def _purge_expired(self, now):
+        expired = [fp for fp, entry in self.entries.items() if entry[1] <= now]
+        for fingerprint in expired:
+            del self.entries[fingerprint]
+            self._expire(fingerprint)
+
+    def _expire(self, fingerprint):
+        message_store_evictions_total.labels(reason="ttl").inc()
+        self._drop(fingerprint, "expired")
+
+    def _drop(self, fingerprint, reason):
+        self.dropped[fingerprint] = reason
+        self.dropped.move_to_end(fingerprint)
+        while len(self.dropped) > self.max_entries:
+            self.dropped.popitem(last=False)
+
+
+def build_message_store(path, ttl, max_entries):
+    """Create the store, persisted to SQLite when a path is configured"""
+    backend = None
+    if path:
+        backend = SQLiteBackend(path)
+        logger.info(f"Persisting message_id map to {path}")
+    return MessageStore(ttl, max_entries, backend)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""API calls and latency per provisioned namespace, read+create vs apply.
+
+Provisions ``--namespaces`` namespaces, each with the full manifest of
+templates/ (every NAMESPACE_OBJECTS enabled), against benchmarks/fake_api.py with ``--latency`` seconds per
+API call, three ways:
+
+- ``read+create``: the previous approach, a read then a create for every
+  object, one after the other
+- ``apply``: apply_namespace_manifest(), create the Namespace then
+  server-side apply the other objects concurrently
+- ``apply retry``: apply_namespace_manifest() again on the same
+  namespaces, as a retried webhook would, which must converge
+
+    python benchmarks/bench_apply.py --namespaces 50 --latency 0.02
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+sys.path.insert(0, ROOT)
+
+from fake_api import start_fake_api, write_kubeconfig  # noqa: E402
+
+
+def read_create(kubernetes_service, manifest):
+    """The pre-apply approach, 2 sequential calls per object"""
+    from kubernetes.client.rest import ApiException
+
+    api_client = kubernetes_service.core_api.api_client
+    for doc in manifest:
+        metadata = doc["metadata"]
+        path = kubernetes_service.APPLY_PATHS[doc["kind"]].format(
+            namespace=metadata.get("namespace"), name=metadata["name"]
+        )
+        try:
+            api_client.call_api(path, "GET", auth_settings=["BearerToken"], response_type="object")
+            continue
+        except ApiException as e:
+            if e.status != 404:
+                raise
+        collection = path.rsplit("/", 1)[0]
+        api_client.call_api(
+            collection, "POST", body=doc, auth_settings=["BearerToken"], response_type="object"
+        )
+
+
+def measure(api, label, namespaces, provision):
+    api.reset_calls()
+    timings = []
+    for manifest in namespaces:
+        start = time.perf_counter()
+        provision(manifest)
+        timings.append((time.perf_counter() - start) * 1000)
+    with api.lock:
+        calls = dict(api.calls)
+    timings.sort()
+    return {
+        "label": label,
+        "calls": sum(calls.values()) / len(namespaces),
+        "p50_ms": timings[len(timings) // 2],
+        "p99_ms": timings[min(len(timings) - 1, int(0.99 * len(timings)))],
+        "by_route": calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--namespaces", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per fake API call")
+    args = parser.parse_args()
+
+    api = start_fake_api(latency=args.latency)
+    workdir = tempfile.mkdtemp()
+    write_kubeconfig(os.path.join(workdir, "kubeconfig"), api.url)
+    os.environ.update(
+        KUBECONFIG_PATH=os.path.join(workdir, "kubeconfig"),
+        KUBERNETES_SERVICE_HOST="",
+        TEAM_PREFIXES=json.dumps({"sre": "technical-sre"}),
+        NAMESPACE_OBJECTS=json.dumps(["resourcequota", "limitrange", "rolebinding", "networkpolicy"]),
+    )
+    os.chdir(ROOT)
+
+    from services import kubernetes_service
+    from services.namespace_service import render_namespace_manifest
+
+    def manifests(run):
+        return [
+            render_namespace_manifest(
+                namespace=f"technical-sre-{run}-app-{n}",
+                team="sre",
+                project=run,
+                app=f"app-{n}",
+                site="dc1",
+                request_number=f"OPS-{run}-{n}",
+                creator="bench",
+                approved_by="admin",
+            )
+            for n in range(args.namespaces)
+        ]
+
+    legacy = manifests(uuid.uuid4().hex[:6])
+    current = manifests(uuid.uuid4().hex[:6])
+    rows = [
+        measure(api, "read+create", legacy, lambda m: read_create(kubernetes_service, m)),
+        measure(api, "apply", current, kubernetes_service.apply_namespace_manifest),
+        measure(api, "apply retry", current, kubernetes_service.apply_namespace_manifest),
+    ]
+
+    print(
+        f"{args.namespaces} namespaces x {len(current[0])} objects, "
+        f"{args.latency * 1000:.0f} ms per API call"
+    )
+    print(f"{'':>12} {'calls/ns':>9} {'p50 ms':>8} {'p99 ms':>8}  calls")
+    for row in rows:
+        print(
+            f"{row['label']:>12} {row['calls']:9.1f} {row['p50_ms']:8.1f} "
+            f"{row['p99_ms']:8.1f}  {row['by_route']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""/webhook/bulk wall-clock time versus the provisioning concurrency limit.
+
+Starts main.py once per ``--workers`` value (JOB_WORKERS) against
+benchmarks/fake_api.py and provisions ``--issues`` issues in a single
+bulk request, found through a JQL search. Two of the issues ask for the
+same application name, one of them is rejected as a duplicate. With
+``--latency`` seconds per API call the wall time should drop roughly
+linearly with the number of workers, not grow with the issue count.
+
+    python benchmarks/bench_bulk.py --issues 64 --workers 1 4 16 --latency 0.02
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+from bench_server import JIRA_FIELDS, PORT, SECRET  # noqa: E402
+from fake_api import start_fake_api, write_kubeconfig  # noqa: E402
+
+
+def make_issue(n, app):
+    return {
+        "key": f"OPS-{n}",
+        "fields": {
+            "creator": {"name": "bench"},
+            "status": {"name": "تایید شده توسط ادمین کوبرنتیز"},
+            "project": {"key": "OPS"},
+            "issuetype": {"name": "Task"},
+            JIRA_FIELDS["site"]: {"value": "dc1"},
+            JIRA_FIELDS["team"]: {"value": "sre"},
+            JIRA_FIELDS["project"]: "bench",
+            JIRA_FIELDS["application"]: app,
+        },
+    }
+
+
+def start_server(workers, args, api, workdir):
+    env = dict(
+        os.environ,
+        JIRA_URL=api.url,
+        JIRA_TOKEN="bench",
+        WEBHOOK_SECRET=SECRET,
+        KUBECONFIG_PATH=os.path.join(workdir, "kubeconfig"),
+        TEAM_PREFIXES=json.dumps({"sre": "technical-sre"}),
+        JIRA_FIELDS=json.dumps(JIRA_FIELDS),
+        KUBERNETES_SERVICE_HOST="",
+        JOB_WORKERS=str(workers),
+        JOB_QUEUE_SIZE=str(args.issues),
+        BULK_MAX_ISSUES=str(args.issues),
+        BULK_TIMEOUT_SECONDS=str(args.timeout),
+    )
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    log = open(os.path.join(workdir, f"bulk-{workers}.log"), "wb")
+    proc = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{PORT}/metrics", timeout=1)
+            return proc
+        except requests.RequestException:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.1)
+    proc.terminate()
+    raise SystemExit(f"server did not come up, see {log.name}")
+
+
+def run(workers, args, api, workdir):
+    run_id = uuid.uuid4().hex[:6]
+    with api.lock:
+        api.issues = [make_issue(n, f"app-{run_id}-{n}") for n in range(1, args.issues)]
+        # The last issue asks for the first one's namespace
+        api.issues.append(make_issue(args.issues, f"app-{run_id}-1"))
+    proc = start_server(workers, args, api, workdir)
+    try:
+        api.reset_calls()
+        start = time.perf_counter()
+        resp = requests.post(
+            f"http://127.0.0.1:{PORT}/webhook/bulk?token={SECRET}",
+            json={"user": {"name": "admin"}, "jql": "project = OPS AND status = Approved"},
+            timeout=args.timeout + 10,
+        )
+        wall = time.perf_counter() - start
+        body = resp.json()
+        if "summary" not in body:
+            print(resp.status_code, body)
+        with api.lock:
+            calls = sum(api.calls.values())
+    finally:
+        proc.terminate()
+        proc.wait(30)
+    return {"wall_s": wall, "summary": body.get("summary"), "api_calls": calls}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--issues", type=int, default=64)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per fake API call")
+    parser.add_argument("--timeout", type=int, default=120)
+    args = parser.parse_args()
+
+    api = start_fake_api(latency=args.latency)
+    workdir = tempfile.mkdtemp()
+    write_kubeconfig(os.path.join(workdir, "kubeconfig"), api.url)
+    results = {}
+    try:
+        for workers in args.workers:
+            results[workers] = run(workers, args, api, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.issues} issues per bulk request, {args.latency * 1000:.0f} ms per API call")
+    print(f"{'workers':>8} {'wall s':>8} {'issues/s':>9} {'API calls':>10}  summary")
+    for workers, row in results.items():
+        print(
+            f"{workers:>8} {row['wall_s']:8.2f} {args.issues / row['wall_s']:9.1f} "
+            f"{row['api_calls']:>10}  {row['summary']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
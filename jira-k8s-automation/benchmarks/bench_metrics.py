@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""/metrics size and generate_latest() time with many provisioned namespaces.
+
+Records the metrics of ``--namespaces`` provisioned namespaces (a few
+percent failing) twice:
+
+- ``before``: the previous label sets, with namespace, app, creator,
+  approved_by and request_number on counters, histograms and per-namespace
+  gauges that never expire, rebuilt here in a separate registry
+- ``after``: services/metrics_service.py as it is, with namespace_info and
+  last_namespace_creation_timestamp collected from a namespace list whose
+  creation times are spread over ``--days`` days
+
+and prints series count, exposition size and generate_latest() time.
+
+    python benchmarks/bench_metrics.py --namespaces 10000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+from prometheus_client import (  # noqa: E402
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+BUCKETS = (0.1, 0.3, 0.5, 1, 2, 5, 10, 20, 30, 60)
+
+
+def previous_metrics(registry):
+    """The label sets metrics_service used before the redesign"""
+
+    def counter(name, labels):
+        return Counter(name, name, labels, registry=registry)
+
+    return {
+        "requests": counter(
+            "jira_requests_total", ["team", "project", "app", "creator", "approved_by", "status"]
+        ),
+        "success": counter(
+            "namespace_creation_success_total", ["team", "project", "app", "creator", "approved_by"]
+        ),
+        "failed": counter(
+            "namespace_creation_failed_total",
+            ["team", "project", "app", "creator", "approved_by", "error_type"],
+        ),
+        "operations": counter(
+            "kubernetes_namespace_operations_total",
+            ["operation", "namespace", "team", "project", "app", "result"],
+        ),
+        "duration": Histogram(
+            "request_processing_seconds",
+            "request_processing_seconds",
+            ["team", "project", "app", "status"],
+            buckets=BUCKETS,
+            registry=registry,
+        ),
+        "transitions": counter(
+            "jira_transition_total", ["transition_name", "team", "project", "app", "approved_by", "result"]
+        ),
+        "comments": counter("jira_comments_total", ["team", "project", "app", "result"]),
+        "info": Gauge(
+            "namespace_info",
+            "namespace_info",
+            ["namespace", "team", "project", "app", "site", "creator", "approved_by", "request_number"],
+            registry=registry,
+        ),
+        "timestamp": Gauge(
+            "last_namespace_creation_timestamp",
+            "last_namespace_creation_timestamp",
+            ["namespace", "team", "project", "app"],
+            registry=registry,
+        ),
+    }
+
+
+def workload(count, days, seed=1):
+    rng = random.Random(seed)
+    now = time.time()
+    for n in range(count):
+        yield {
+            "namespace": f"technical-team{n % 8}-project{n % 400}-app{n}",
+            "team": f"team{n % 8}",
+            "project": f"project{n % 400}",
+            "app": f"app{n}",
+            "site": f"dc{n % 3}",
+            "creator": f"user{rng.randrange(300)}",
+            "approved_by": f"admin{rng.randrange(15)}",
+            "request_number": f"OPS-{n}",
+            "failed": rng.random() < 0.05,
+            "error_type": rng.choice(["AlreadyExists", "CreateFailed_500", "KeyError", "ApplyFailed_422"]),
+            "duration": rng.expovariate(1.0),
+            "created": now - rng.random() * days * 86400,
+        }
+
+
+def record_before(metrics, ns):
+    identity = dict(team=ns["team"], project=ns["project"], app=ns["app"])
+    people = dict(creator=ns["creator"], approved_by=ns["approved_by"])
+    metrics["requests"].labels(**identity, **people, status="approved").inc()
+    result = "failed" if ns["failed"] else "success"
+    metrics["operations"].labels(operation="create", namespace=ns["namespace"], result=result, **identity).inc()
+    metrics["duration"].labels(status=result, **identity).observe(ns["duration"])
+    if ns["failed"]:
+        metrics["failed"].labels(error_type=ns["error_type"], **identity, **people).inc()
+        metrics["transitions"].labels(
+            transition_name="reject", approved_by=ns["approved_by"], result="success", **identity
+        ).inc()
+        return
+    metrics["success"].labels(**identity, **people).inc()
+    metrics["comments"].labels(result="success", **identity).inc()
+    metrics["transitions"].labels(
+        transition_name="approve", approved_by=ns["approved_by"], result="success", **identity
+    ).inc()
+    metrics["info"].labels(
+        namespace=ns["namespace"], site=ns["site"], request_number=ns["request_number"], **identity, **people
+    ).set(1)
+    metrics["timestamp"].labels(namespace=ns["namespace"], **identity).set(ns["created"])
+
+
+def record_after(metrics_service, ns):
+    team, project = ns["team"], ns["project"]
+    metrics_service.jira_requests_total.labels(team=team, project=project, status="approved").inc()
+    result = "failed" if ns["failed"] else "success"
+    metrics_service.kubernetes_namespace_operations_total.labels(
+        operation="create", team=team, project=project, result=result
+    ).inc()
+    metrics_service.request_processing_seconds.labels(team=team, status=result).observe(ns["duration"])
+    if ns["failed"]:
+        metrics_service.namespace_creation_failed_total.labels(
+            team=team, project=project, error_type=ns["error_type"]
+        ).inc()
+        metrics_service.jira_transition_total.labels(
+            transition_name="reject", team=team, result="success"
+        ).inc()
+        return
+    metrics_service.namespace_creation_success_total.labels(team=team, project=project).inc()
+    metrics_service.jira_comments_total.labels(team=team, result="success").inc()
+    metrics_service.jira_transition_total.labels(
+        transition_name="approve", team=team, result="success"
+    ).inc()
+
+
+def as_provisioned(ns):
+    return {
+        "name": ns["namespace"],
+        "labels": {
+            "team": ns["team"],
+            "project": ns["project"],
+            "application": ns["app"],
+            "site": ns["site"],
+            "request_number": ns["request_number"],
+        },
+        "annotations": {
+            "jira-k8s-automation/creator": ns["creator"],
+            "jira-k8s-automation/approved-by": ns["approved_by"],
+        },
+        "created": ns["created"],
+    }
+
+
+def measure(registry, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = generate_latest(registry)
+        timings.append((time.perf_counter() - start) * 1000)
+    series = sum(
+        1 for line in data.decode().splitlines() if line and not line.startswith("#")
+    )
+    return {"series": series, "bytes": len(data), "ms": statistics.median(timings)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--namespaces", type=int, default=10000)
+    parser.add_argument("--days", type=float, default=90, help="spread of namespace creation times")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    from services import metrics_service
+
+    namespaces = list(workload(args.namespaces, args.days))
+
+    before = CollectorRegistry()
+    metrics = previous_metrics(before)
+    for ns in namespaces:
+        record_before(metrics, ns)
+
+    for ns in namespaces:
+        record_after(metrics_service, ns)
+    provisioned = [as_provisioned(ns) for ns in namespaces if not ns["failed"]]
+    metrics_service.namespace_collector.source = lambda: provisioned
+
+    rows = {"before": measure(before, args.repeat), "after": measure(REGISTRY, args.repeat)}
+
+    print(
+        f"{args.namespaces} namespaces over {args.days:g} days, "
+        f"METRICS_MAX_SERIES={metrics_service.METRICS_MAX_SERIES}, "
+        f"METRICS_NAMESPACE_TTL_SECONDS={metrics_service.METRICS_NAMESPACE_TTL_SECONDS}"
+    )
+    print(f"{'':>7} {'series':>8} {'KiB':>9} {'generate_latest ms':>19}")
+    for label, row in rows.items():
+        print(f"{label:>7} {row['series']:8d} {row['bytes'] / 1024:9.1f} {row['ms']:19.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Per-scrape cost of /metrics, rendered per request vs the cached snapshot.
+
+Fills the registry with the metrics of ``--namespaces`` provisioned
+namespaces, as in benchmarks/bench_metrics.py, then answers ``--scrapes``
+scrapes through metrics_response() four ways:
+
+- ``render``: METRICS_CACHE_SECONDS=0, generate_latest() on every scrape
+- ``cached``: the MetricsCache snapshot, uncompressed
+- ``cached gzip``: the snapshot with Accept-Encoding: gzip
+- ``304``: If-None-Match with the snapshot's ETag
+
+and prints the request-thread CPU time and body size per scrape. The
+snapshot itself costs one render every METRICS_CACHE_SECONDS, whatever
+the number of scrapers.
+
+    python benchmarks/bench_metrics_cache.py --namespaces 10000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+sys.path.insert(0, ROOT)
+
+from bench_metrics import as_provisioned, record_after, workload  # noqa: E402
+
+
+def measure(label, scrapes, respond):
+    timings = []
+    for _ in range(scrapes):
+        start = time.thread_time()
+        body, status, headers = respond()
+        timings.append((time.thread_time() - start) * 1000)
+    return {"label": label, "status": status, "bytes": len(body), "ms": statistics.median(timings)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--namespaces", type=int, default=10000)
+    parser.add_argument("--days", type=float, default=3, help="spread of namespace creation times")
+    parser.add_argument("--scrapes", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    os.environ["METRICS_CACHE_SECONDS"] = "3600"
+    from services import metrics_service
+
+    namespaces = list(workload(args.namespaces, args.days))
+    for ns in namespaces:
+        record_after(metrics_service, ns)
+    provisioned = [as_provisioned(ns) for ns in namespaces if not ns["failed"]]
+    metrics_service.namespace_collector.source = lambda: provisioned
+
+    cache = metrics_service.metrics_cache
+    start = time.thread_time()
+    cache.response()
+    refresh_ms = (time.thread_time() - start) * 1000
+    etag = cache.snapshot["etag"]
+
+    rows = [
+        measure("render", args.scrapes, lambda: (metrics_service.render_metrics(), 200, {})),
+        measure("cached", args.scrapes, lambda: cache.response("", "")),
+        measure("cached gzip", args.scrapes, lambda: cache.response("gzip", "")),
+        measure("304", args.scrapes, lambda: cache.response("gzip", etag)),
+    ]
+
+    print(
+        f"{args.namespaces} namespaces, {args.scrapes} scrapes each, "
+        f"snapshot refresh (render + gzip) {refresh_ms:.1f} ms CPU"
+    )
+    print(f"{'':>11} {'status':>6} {'KiB':>8} {'CPU ms/scrape':>14}")
+    for row in rows:
+        print(f"{row['label']:>11} {row['status']:6d} {row['bytes'] / 1024:8.1f} {row['ms']:14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""/webhook throughput of the Flask dev server versus gunicorn.
+
+Both servers run main.py against benchmarks/fake_api.py, so every
+approved webhook goes through the full pipeline (namespace lookups,
+create, Jira comment and transition) with ``--latency`` seconds per API
+call. Each request uses a fresh application name so none is rejected as
+a duplicate. Prints requests/sec and latency percentiles of /webhook per
+server, the rate at which the queued provisioning jobs completed, and
+checks that /metrics counted every namespace across all workers.
+
+    python benchmarks/bench_server.py --requests 400 --concurrency 16 \\
+        --latency 0.02 --workers 4 --threads 8
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+from fake_api import start_fake_api, write_kubeconfig  # noqa: E402
+
+JIRA_FIELDS = {
+    "site": "customfield_10200",
+    "team": "customfield_10201",
+    "project": "customfield_10202",
+    "application": "customfield_10300",
+}
+SECRET = "bench"
+PORT = 5000
+
+
+def make_payload(n, run):
+    return {
+        "user": {"name": "admin"},
+        "issue": {
+            "key": f"OPS-{n}",
+            "fields": {
+                "creator": {"name": "bench"},
+                "status": {"name": "تایید شده توسط ادمین کوبرنتیز"},
+                "project": {"key": "OPS"},
+                "issuetype": {"name": "Task"},
+                JIRA_FIELDS["site"]: {"value": "dc1"},
+                JIRA_FIELDS["team"]: {"value": "sre"},
+                JIRA_FIELDS["project"]: "bench",
+                JIRA_FIELDS["application"]: f"app-{run}-{n}",
+            },
+        },
+    }
+
+
+def start_server(kind, args, api, workdir):
+    env = dict(
+        os.environ,
+        JIRA_URL=api.url,
+        JIRA_TOKEN="bench",
+        WEBHOOK_SECRET=SECRET,
+        KUBECONFIG_PATH=os.path.join(workdir, "kubeconfig"),
+        TEAM_PREFIXES=json.dumps({"sre": "technical-sre"}),
+        JIRA_FIELDS=json.dumps(JIRA_FIELDS),
+        KUBERNETES_SERVICE_HOST="",
+        JOB_QUEUE_SIZE=str(args.requests),
+    )
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    if kind == "dev":
+        cmd = [sys.executable, "main.py"]
+    else:
+        cmd = [sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py", "main:app"]
+        env.update(
+            GUNICORN_WORKERS=str(args.workers),
+            GUNICORN_THREADS=str(args.threads),
+            GUNICORN_WORKER_TMP_DIR=workdir,
+            PROMETHEUS_MULTIPROC_DIR=os.path.join(workdir, "prometheus"),
+        )
+    log = open(os.path.join(workdir, f"{kind}.log"), "wb")
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{PORT}/metrics", timeout=1)
+            return proc
+        except requests.RequestException:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.1)
+    proc.terminate()
+    raise SystemExit(f"{kind} server did not come up, see {log.name}")
+
+
+def scrape_successes():
+    text = requests.get(f"http://127.0.0.1:{PORT}/metrics", timeout=10).text
+    total = 0
+    for line in text.splitlines():
+        if line.startswith("namespace_creation_success_total{"):
+            total += float(line.rsplit(" ", 1)[1])
+    return int(total)
+
+
+def percentile(values, q):
+    return round(values[min(len(values) - 1, int(q * len(values)))], 1)
+
+
+def run(kind, args, api, workdir):
+    proc = start_server(kind, args, api, workdir)
+    url = f"http://127.0.0.1:{PORT}/webhook?token={SECRET}"
+    run_id = uuid.uuid4().hex[:6]
+    local = threading.local()
+    lock = threading.Lock()
+    timings, statuses = [], {}
+
+    def post(n):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        resp = session.post(url, json=make_payload(n, run_id))
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            timings.append(elapsed)
+            statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+    try:
+        api.reset_calls()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            list(pool.map(post, range(args.requests)))
+        wall = time.perf_counter() - start
+        # Provisioning runs in the background, wait for the jobs
+        accepted = statuses.get(202, 0)
+        deadline = time.monotonic() + args.job_timeout
+        counted = scrape_successes()
+        while counted < accepted and time.monotonic() < deadline:
+            time.sleep(0.2)
+            counted = scrape_successes()
+        done = time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.wait(30)
+
+    timings.sort()
+    return {
+        "requests_per_sec": round(args.requests / wall, 1),
+        "p50_ms": percentile(timings, 0.50),
+        "p99_ms": percentile(timings, 0.99),
+        "jobs_per_sec": round(counted / done, 1),
+        "status": {str(k): v for k, v in sorted(statuses.items())},
+        "metrics_successes": counted,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per fake API call")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--job-timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    api = start_fake_api(latency=args.latency)
+    workdir = tempfile.mkdtemp()
+    write_kubeconfig(os.path.join(workdir, "kubeconfig"), api.url)
+    results = {}
+    try:
+        for kind in ("dev", "gunicorn"):
+            results[kind] = run(kind, args, api, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(
+        f"{args.requests} requests, concurrency {args.concurrency}, "
+        f"{args.latency * 1000:.0f} ms per API call, "
+        f"gunicorn {args.workers} workers x {args.threads} threads"
+    )
+    print(
+        f"{'server':>9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'jobs/s':>8} {'/metrics ok':>12}  status"
+    )
+    for kind, row in results.items():
+        ok = row["metrics_successes"] == row["status"].get("202", 0)
+        print(
+            f"{kind:>9} {row['requests_per_sec']:8.1f} {row['p50_ms']:8.1f} "
+            f"{row['p99_ms']:8.1f} {row['jobs_per_sec']:8.1f} {str(ok):>12}  {row['status']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
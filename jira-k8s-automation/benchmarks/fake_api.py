@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""In-memory Jira + Kubernetes API server for benchmarks.
+
+Serves just enough of the Jira REST API (serverInfo, myself, fields,
+issues, search, transitions, comments) and of the Kubernetes API (namespaces and
+namespaced objects) for the webhook to run its whole pipeline, with an
+optional per-request latency. Every request is counted per route so
+benchmarks can report API calls per provisioned namespace.
+
+    python benchmarks/fake_api.py --port 8080 --latency 0.02
+"""
+
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+TRANSITIONS = [
+    {"id": "11", "name": "تایید درخواست"},
+    {"id": "21", "name": "رد شدن درخواست"},
+]
+
+JIRA_ISSUE_RE = re.compile(r"^/rest/api/2/issue/([^/]+)(/transitions|/comment)?$")
+KUBE_RE = re.compile(
+    r"^/(?:api/v1|apis/(?P<group>[^/]+)/(?P<version>[^/]+))"
+    r"(?:/namespaces/(?P<namespace>[^/]+))?"
+    r"/(?P<plural>[^/]+)(?:/(?P<name>[^/]+))?$"
+)
+
+
+class FakeAPI:
+    """Shared state of the fake servers, safe to read from the benchmark"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.calls = Counter()
+        self.objects = {}
+        # Issues returned by every Jira search, whatever the JQL
+        self.issues = []
+        # Watch history: (resourceVersion, collection, type, object)
+        self.events = []
+        self.compacted = 0
+        self.resource_version = 1
+        self.server = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset_calls(self):
+        with self.lock:
+            self.calls.clear()
+
+    def count(self, key):
+        with self.lock:
+            self.calls[key] += 1
+
+    def store(self, key, obj, create_only=False):
+        """Create or replace an object, returns (stored, created)"""
+        with self.lock:
+            created = key not in self.objects
+            if create_only and not created:
+                return None, False
+            self.resource_version += 1
+            metadata = obj.setdefault("metadata", {})
+            metadata["resourceVersion"] = str(self.resource_version)
+            if created:
+                metadata["creationTimestamp"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            else:
+                metadata["creationTimestamp"] = self.objects[key]["metadata"].get("creationTimestamp")
+            self.objects[key] = obj
+            self._record(key[0], "ADDED" if created else "MODIFIED", obj)
+            return obj, created
+
+    def delete(self, key):
+        with self.lock:
+            obj = self.objects.pop(key, None)
+            if obj is not None:
+                self.resource_version += 1
+                obj["metadata"]["resourceVersion"] = str(self.resource_version)
+                self._record(key[0], "DELETED", obj)
+            return obj
+
+    def _record(self, collection, kind, obj):
+        self.events.append((self.resource_version, collection, kind, json.loads(json.dumps(obj))))
+        self.changed.notify_all()
+
+    def compact(self):
+        """Forget the watch history, older resourceVersions get 410 Gone"""
+        with self.lock:
+            self.events.clear()
+            self.compacted = self.resource_version
+
+
+class FakeHTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients that exit mid-watch are expected, not worth a traceback
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_fake_api(port=0, latency=0.0):
+    """Serve a FakeAPI on 127.0.0.1 from a daemon thread"""
+    api = FakeAPI(latency)
+
+    class Handler(FakeAPIHandler):
+        state = api
+
+    api.server = FakeHTTPServer(("127.0.0.1", port), Handler)
+    api.server.daemon_threads = True
+    threading.Thread(target=api.server.serve_forever, daemon=True).start()
+    return api
+
+
+def write_kubeconfig(path, url):
+    """Kubeconfig pointing the kubernetes client at ``url``"""
+    config = {
+        "apiVersion": "v1",
+        "kind": "Config",
+        "clusters": [{"name": "fake", "cluster": {"server": url}}],
+        "users": [{"name": "fake", "user": {"token": "fake"}}],
+        "contexts": [{"name": "fake", "context": {"cluster": "fake", "user": "fake"}}],
+        "current-context": "fake",
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body leave in one segment, no Nagle / delayed ACK stalls
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+    state = None
+
+    def log_message(self, *args):
+        pass
+
+    # -----------------------------------
+    # Plumbing
+    # -----------------------------------
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _reply(self, status, body=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        if body is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _dispatch(self, method):
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/rest/api/2/"):
+            return self._jira(method, path)
+        match = KUBE_RE.match(path)
+        if match:
+            return self._kube(method, match)
+        self.state.count(f"{method} unknown")
+        self._reply(404, {"message": f"no route for {path}"})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    # -----------------------------------
+    # Jira
+    # -----------------------------------
+
+    def _jira(self, method, path):
+        base = self.state.url
+        if path == "/rest/api/2/serverInfo":
+            self.state.count("jira GET serverInfo")
+            return self._reply(200, {
+                "baseUrl": base,
+                "version": "9.12.0",
+                "versionNumbers": [9, 12, 0],
+                "deploymentType": "Server",
+                "buildNumber": 912000,
+                "serverTitle": "Fake Jira",
+            })
+        if path == "/rest/api/2/myself":
+            self.state.count("jira GET myself")
+            return self._reply(200, {"name": "k8s_auto", "key": "k8s_auto"})
+
+        if path == "/rest/api/2/field":
+            # Field names, the client reads them once to resolve search fields
+            self.state.count("jira GET field")
+            return self._reply(200, [
+                {"id": name, "key": name, "name": name, "custom": name.startswith("customfield_")}
+                for name in ("status", "creator", "project", "issuetype")
+            ])
+        if path == "/rest/api/2/search":
+            self.state.count("jira GET search")
+            query = parse_qs(urlsplit(self.path).query)
+            limit = int(query.get("maxResults", ["50"])[0])
+            with self.state.lock:
+                issues = list(self.state.issues[:limit])
+            return self._reply(200, {
+                "startAt": 0,
+                "maxResults": limit,
+                "total": len(self.state.issues),
+                "issues": issues,
+            })
+
+        match = JIRA_ISSUE_RE.match(path)
+        if not match:
+            self.state.count(f"jira {method} unknown")
+            return self._reply(404, {"errorMessages": [f"no route for {path}"]})
+
+        key, sub = match.group(1), match.group(2)
+        if sub is None and method == "GET":
+            self.state.count("jira GET issue")
+            return self._reply(200, {
+                "id": str(abs(hash(key)) % 100000),
+                "key": key,
+                "self": f"{base}/rest/api/2/issue/{key}",
+                "fields": {
+                    "project": {"key": key.split("-")[0]},
+                    "issuetype": {"name": "Task"},
+                    "status": {"name": "تایید شده توسط ادمین کوبرنتیز"},
+                },
+            })
+        if sub == "/transitions" and method == "GET":
+            self.state.count("jira GET transitions")
+            return self._reply(200, {"transitions": TRANSITIONS})
+        if sub == "/transitions" and method == "POST":
+            self.state.count("jira POST transitions")
+            wanted = str(self._body().get("transition", {}).get("id"))
+            if wanted not in {t["id"] for t in TRANSITIONS}:
+                return self._reply(400, {"errorMessages": [f"Transition id '{wanted}' is not valid"]})
+            return self._reply(204)
+        if sub == "/comment" and method == "POST":
+            self.state.count("jira POST comment")
+            body = self._body()
+            return self._reply(201, {
+                "id": "1",
+                "self": f"{base}/rest/api/2/issue/{key}/comment/1",
+                "body": body.get("body", ""),
+            })
+
+        self.state.count(f"jira {method} unknown")
+        self._reply(405, {"errorMessages": [f"{method} not allowed"]})
+
+    # -----------------------------------
+    # Kubernetes
+    # -----------------------------------
+
+    def _status(self, code, reason, message):
+        self._reply(code, {
+            "kind": "Status",
+            "apiVersion": "v1",
+            "status": "Failure",
+            "reason": reason,
+            "message": message,
+            "code": code,
+        })
+
+    def _kube(self, method, match):
+        group = match.group("group") or ""
+        plural = match.group("plural")
+        namespace = match.group("namespace")
+        name = match.group("name")
+        kind = f"{group}/{plural}" if group else plural
+        self.state.count(f"kube {method} {kind}")
+        objects = self.state.objects
+        collection = (group, namespace, plural)
+
+        if method == "GET" and name is None:
+            query = parse_qs(urlsplit(self.path).query)
+            if query.get("watch", [""])[0] in ("true", "1", "True"):
+                return self._watch(collection, query)
+            selector = dict(
+                term.split("=", 1)
+                for term in query.get("labelSelector", [""])[0].split(",")
+                if "=" in term
+            )
+            with self.state.lock:
+                items = [
+                    obj for (coll, _), obj in objects.items()
+                    if coll == collection and selector.items() <= (
+                        obj.get("metadata", {}).get("labels") or {}
+                    ).items()
+                ]
+                version = str(self.state.resource_version)
+            return self._reply(200, {
+                "kind": "List",
+                "apiVersion": "v1",
+                "metadata": {"resourceVersion": version},
+                "items": items,
+            })
+
+        if method == "POST" and name is None:
+            body = self._body()
+            name = body.get("metadata", {}).get("name")
+            obj, created = self.state.store((collection, name), body, create_only=True)
+            if not created:
+                return self._status(409, "AlreadyExists", f'{plural} "{name}" already exists')
+            return self._reply(201, obj)
+
+        key = (collection, name)
+        if method == "GET":
+            obj = objects.get(key)
+            if obj is None:
+                return self._status(404, "NotFound", f'{plural} "{name}" not found')
+            return self._reply(200, obj)
+
+        if method == "PATCH":
+            obj, created = self.state.store(key, self._body())
+            return self._reply(201 if created else 200, obj)
+
+        if method == "DELETE":
+            obj = self.state.delete(key)
+            if obj is None:
+                return self._status(404, "NotFound", f'{plural} "{name}" not found')
+            return self._reply(200, obj)
+
+        self._status(405, "MethodNotAllowed", f"{method} not allowed")
+
+
+    def _watch(self, collection, query):
+        """Stream events after resourceVersion until timeoutSeconds"""
+        since = int(query.get("resourceVersion", ["0"])[0] or 0)
+        deadline = time.monotonic() + float(query.get("timeoutSeconds", ["300"])[0])
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        state = self.state
+
+        def send(event):
+            data = json.dumps(event).encode("utf-8") + b"\n"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        while True:
+            with state.lock:
+                if since < state.compacted:
+                    pending, gone = [], True
+                else:
+                    gone = False
+                    pending = [e for e in state.events if e[0] > since and e[1] == collection]
+                    if not pending:
+                        state.changed.wait(min(1.0, max(0.0, deadline - time.monotonic())))
+            if gone:
+                send({"type": "ERROR", "object": {
+                    "kind": "Status", "apiVersion": "v1", "status": "Failure",
+                    "reason": "Expired", "message": f"too old resource version: {since}",
+                    "code": 410,
+                }})
+                break
+            try:
+                for version, _, kind, obj in pending:
+                    send({"type": kind, "object": obj})
+                    since = version
+            except OSError:
+                self.close_connection = True
+                return
+            if time.monotonic() >= deadline:
+                break
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    api = start_fake_api(args.port, args.latency)
+    print(f"Fake Jira + Kubernetes API on {api.url}")
+    try:
+        while True:
+            time.sleep(5)
+            print(json.dumps(dict(api.calls), ensure_ascii=False))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -7,4 +7,26 @@ WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
 KUBECONFIG_PATH = os.getenv("KUBECONFIG_PATH", ".kube/config")
 KUBECTL_CLIENT_ADDRESS = os.getenv("KUBECTL_CLIENT_ADDRESS")
 TEAM_PREFIXES = json.loads(os.getenv("TEAM_PREFIXES", "{}"))
-JIRA_FIELDS = json.loads(os.getenv("JIRA_FIELDS", "{}"))
\ No newline at end of file
+JIRA_FIELDS = json.loads(os.getenv("JIRA_FIELDS", "{}"))
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+JIRA_TRANSITION_CACHE_TTL = int(os.getenv("JIRA_TRANSITION_CACHE_TTL", "3600"))
+NAMESPACE_CACHE_ENABLED = os.getenv("NAMESPACE_CACHE_ENABLED", "true").lower() == "true"
+NAMESPACE_WATCH_TIMEOUT_SECONDS = int(os.getenv("NAMESPACE_WATCH_TIMEOUT_SECONDS", "300"))
+BULK_MAX_ISSUES = int(os.getenv("BULK_MAX_ISSUES", "100"))
+BULK_TIMEOUT_SECONDS = int(os.getenv("BULK_TIMEOUT_SECONDS", "50"))
+TEMPLATE_DIR = os.getenv("TEMPLATE_DIR", "templates")
+TEMPLATE_RELOAD_SECONDS = int(os.getenv("TEMPLATE_RELOAD_SECONDS", "5"))
+NAMESPACE_OBJECTS = json.loads(os.getenv("NAMESPACE_OBJECTS", "[]"))
+NAMESPACE_ROLE = os.getenv("NAMESPACE_ROLE", "edit")
+NAMESPACE_RESOURCE_QUOTA = json.loads(os.getenv("NAMESPACE_RESOURCE_QUOTA", '{"requests.cpu": "4", "requests.memory": "8Gi", "limits.cpu": "8", "limits.memory": "16Gi", "pods": "50"}'))
+NAMESPACE_LIMIT_RANGE = json.loads(os.getenv("NAMESPACE_LIMIT_RANGE", '{"default": {"cpu": "500m", "memory": "512Mi"}, "defaultRequest": {"cpu": "100m", "memory": "128Mi"}}'))
+NAMESPACE_INGRESS_NAMESPACES = json.loads(os.getenv("NAMESPACE_INGRESS_NAMESPACES", '["ingress-nginx", "monitoring"]'))
+KUBERNETES_FIELD_MANAGER = os.getenv("KUBERNETES_FIELD_MANAGER", "jira-k8s-automation")
+KUBERNETES_APPLY_CONCURRENCY = int(os.getenv("KUBERNETES_APPLY_CONCURRENCY", "4"))
+GUNICORN_WORKERS = int(os.getenv("GUNICORN_WORKERS", "2"))
+METRICS_MAX_SERIES = int(os.getenv("METRICS_MAX_SERIES", "1000"))
+METRICS_NAMESPACE_TTL_SECONDS = int(os.getenv("METRICS_NAMESPACE_TTL_SECONDS", "604800"))
+METRICS_CACHE_SECONDS = float(os.getenv("METRICS_CACHE_SECONDS", "0"))
\ No newline at end of file
@@ -0,0 +1,145 @@
+import os
+import shutil
+
+
+# -----------------------------------
+# Gunicorn production server
+#
+# gunicorn --config gunicorn.conf.py main:app
+# -----------------------------------
+
+bind = os.getenv(
+    "GUNICORN_BIND",
+    "0.0.0.0:5000"
+)
+
+# Worker processes, each running a pool
+# of threads so slow Jira / Kubernetes
+# calls do not block other webhooks
+
+workers = int(
+    os.getenv("GUNICORN_WORKERS", "2")
+)
+
+threads = int(
+    os.getenv("GUNICORN_THREADS", "4")
+)
+
+worker_class = "gthread"
+
+# Seconds a worker may stay silent before it
+# is killed, and to finish requests on restart
+
+timeout = int(
+    os.getenv("GUNICORN_TIMEOUT", "60")
+)
+
+graceful_timeout = int(
+    os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30")
+)
+
+keepalive = int(
+    os.getenv("GUNICORN_KEEPALIVE", "5")
+)
+
+# Import the app once in the master so workers
+# fork with Kubernetes config and templates loaded
+
+preload_app = (
+    os.getenv("GUNICORN_PRELOAD", "true").lower()
+    == "true"
+)
+
+# Heartbeat files on tmpfs, the container
+# root filesystem is read-only
+
+worker_tmp_dir = os.getenv(
+    "GUNICORN_WORKER_TMP_DIR",
+    "/dev/shm"
+)
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG")
+
+errorlog = "-"
+
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+
+# -----------------------------------
+# Prometheus multiprocess mode
+# -----------------------------------
+
+# Must be set before prometheus_client is imported,
+# every worker writes its samples to files in here
+
+multiproc_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    "/tmp/prometheus-multiproc"
+)
+
+# Start from an empty directory once per master. This runs
+# before the app is preloaded, on_starting would be too late
+# and wipe the samples written while importing it.
+
+if os.environ.get("PROMETHEUS_MULTIPROC_OWNER") != str(os.getpid()):
+
+    shutil.rmtree(
+        multiproc_dir,
+        ignore_errors=True
+    )
+
+    os.makedirs(
+        multiproc_dir,
+        exist_ok=True
+    )
+
+    os.environ["PROMETHEUS_MULTIPROC_OWNER"] = str(os.getpid())
+
+
+def when_ready(server):
+
+    # The preloaded app created the live gauges in the
+    # master too. The master never updates them and is
+    # never marked dead, so its 0 would always win the
+    # livemin of namespace_cache_synced. Drop its files
+    # before the workers fork.
+
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(
+        os.getpid()
+    )
+
+
+def child_exit(server, worker):
+
+    # Drop live gauges (active_requests)
+    # of workers that are gone
+
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(
+        worker.pid
+    )
+
+
+def post_worker_init(worker):
+
+    # List namespaces and start the watch
+    # before the worker takes requests
+
+    from main import namespace_cache
+
+    namespace_cache.start()
+
+
+def worker_exit(server, worker):
+
+    # Finish provisioning jobs this worker already
+    # accepted before the master kills it
+
+    from main import job_queue
+
+    job_queue.shutdown(
+        max(1, graceful_timeout - 5)
+    )
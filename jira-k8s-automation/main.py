@@ -1,6 +1,9 @@
 import time
 
-from services.exceptions import KubernetesError
+from services.exceptions import (
+    KubernetesError,
+    JobQueueFull
+)
 
 from flask import (
     Flask,
@@ -9,12 +12,22 @@ from flask import (
     abort
 )
 
+from werkzeug.exceptions import HTTPException
+
 from kubernetes.client.rest import ApiException
 
 from config import (
     WEBHOOK_SECRET,
     JIRA_FIELDS,
-    KUBECTL_CLIENT_ADDRESS
+    KUBECTL_CLIENT_ADDRESS,
+    JOB_WORKERS,
+    JOB_QUEUE_SIZE,
+    JOB_RETENTION_SECONDS,
+    NAMESPACE_CACHE_ENABLED,
+    NAMESPACE_WATCH_TIMEOUT_SECONDS,
+    BULK_MAX_ISSUES,
+    BULK_TIMEOUT_SECONDS,
+    METRICS_NAMESPACE_TTL_SECONDS
 )
 
 from services.namespace_service import (
@@ -23,17 +36,20 @@ from services.namespace_service import (
     sanitize_name
 )
 
-from services.kubernetes_service import (
-    apply_namespace_manifest,
-    core_api
-)
+from services.kubernetes_service import apply_namespace_manifest
+
+from services.namespace_cache_service import NamespaceCache
 
 from services.jira_service import (
     add_comment,
     transition_issue,
+    search_issues,
+    get_issue_status,
     jira_health_check
 )
 
+from services.job_service import JobQueue
+
 from services.logger_service import logger
 
 from services.metrics_service import (
@@ -44,8 +60,7 @@ from services.metrics_service import (
     kubernetes_namespace_operations_total,
     request_processing_seconds,
     active_requests,
-    namespace_info,
-    last_namespace_creation_timestamp,
+    namespace_collector,
     jira_transition_total,
     jira_comments_total,
     duplicate_namespace_total,
@@ -57,6 +72,10 @@ from services.metrics_service import (
 
 app = Flask(__name__)
 
+# Jira status an issue must be in to be provisioned
+
+APPROVED_STATUS = "تایید شده توسط ادمین کوبرنتیز"
+
 
 # -----------------------------------
 # Metrics Endpoint
@@ -65,7 +84,10 @@ app = Flask(__name__)
 @app.route("/metrics")
 def metrics():
 
-    return metrics_response()
+    return metrics_response(
+        request.headers.get("Accept-Encoding", ""),
+        request.headers.get("If-None-Match", "")
+    )
 
 
 # -----------------------------------
@@ -94,6 +116,192 @@ def health():
     }), 200
 
 
+# -----------------------------------
+# Jira Issue Parsing
+# -----------------------------------
+
+def new_job(approved_by):
+
+    return {
+        "issue_key": None,
+        "site": "unknown",
+        "team": "unknown",
+        "project": "unknown",
+        "app": "unknown",
+        "creator": "unknown",
+        "approved_by": approved_by,
+        "namespace": "unknown",
+        "workflow": {},
+        "received_at": time.time()
+    }
+
+
+def read_issue(job, issue):
+    """
+    Fill a provisioning job from a Jira issue payload.
+
+    Returns False when the issue is not approved, raises when its
+    fields are invalid. The job keeps whatever was read so far, for
+    the failure metrics.
+    """
+
+    # --------------------------------
+    # Jira issue data
+    # --------------------------------
+
+    issue_key = issue.get("key")
+
+    job["issue_key"] = issue_key
+
+    issue_fields = issue.get(
+        "fields",
+        {}
+    )
+
+    job["creator"] = (
+        issue_fields
+        .get("creator", {})
+        .get("name", "unknown")
+    )
+
+    # --------------------------------
+    # Current Jira status
+    # --------------------------------
+
+    status_name = (
+        issue_fields
+        .get("status", {})
+        .get("name")
+    )
+
+    logger.info(
+        f"Issue={issue_key} "
+        f"Status={status_name}"
+    )
+
+    # Workflow step, transition IDs are cached per step
+
+    job["workflow"] = {
+        "project": (
+            issue_fields
+            .get("project", {})
+            .get("key")
+        ),
+        "issue_type": (
+            issue_fields
+            .get("issuetype", {})
+            .get("name")
+        ),
+        "status": status_name
+    }
+
+    # --------------------------------
+    # Run only when approved
+    # --------------------------------
+
+    if status_name != APPROVED_STATUS:
+
+        invalid_requests_total.labels(
+            reason="status_not_approved"
+        ).inc()
+
+        logger.info(
+            "Ignoring issue"
+        )
+
+        return False
+
+    # --------------------------------
+    # Read Jira custom fields
+    # --------------------------------
+
+    site = issue_fields[
+        JIRA_FIELDS["site"]
+    ]["value"]
+
+    team = issue_fields[
+        JIRA_FIELDS["team"]
+    ]["value"]
+
+    project = issue_fields[
+        JIRA_FIELDS["project"]
+    ]
+
+    app_name = issue_fields[
+        JIRA_FIELDS["application"]
+    ]
+
+    # --------------------------------
+    # Sanitize values
+    # --------------------------------
+
+    job["site"] = sanitize_name(site)
+
+    job["team"] = sanitize_name(team)
+
+    job["project"] = sanitize_name(project)
+
+    job["app"] = sanitize_name(app_name)
+
+    logger.info(
+        f"site={job['site']} "
+        f"team={job['team']} "
+        f"project={job['project']} "
+        f"app={job['app']} "
+        f"creator={job['creator']} "
+        f"approved_by={job['approved_by']} "
+        f"request_number={issue_key}"
+    )
+
+    # --------------------------------
+    # Request Metrics
+    # --------------------------------
+
+    jira_requests_total.labels(
+        team=job["team"],
+        project=job["project"],
+        status="approved"
+    ).inc()
+
+    # --------------------------------
+    # Generate namespace name
+    # --------------------------------
+
+    job["namespace"] = generate_namespace_name(
+        team=job["team"],
+        project=job["project"],
+        app=job["app"]
+    )
+
+    logger.info(
+        f"Namespace={job['namespace']}"
+    )
+
+    return True
+
+
+def bulk_item_error(issue, seen):
+    """
+    Why an entry of a bulk request cannot become a job, None if it can.
+    """
+
+    if not isinstance(issue, dict):
+        return "Issue must be an object"
+
+    issue_key = issue.get("key")
+
+    if not isinstance(issue_key, str) or not issue_key:
+        return "Issue has no key"
+
+    if issue_key in seen:
+        return "Issue is listed more than once"
+
+    if not isinstance(issue.get("fields", {}), dict):
+        return "Issue fields must be an object"
+
+    return None
+
+
 # -----------------------------------
 # Jira Webhook
 # -----------------------------------
@@ -101,16 +309,9 @@ def health():
 @app.route("/webhook", methods=["POST"])
 def jira_webhook():
 
-    start_time = time.time()
-
     active_requests.inc()
 
-    team = "unknown"
-    project = "unknown"
-    app_name = "unknown"
-    creator = "unknown"
-    approved_by = "unknown"
-    namespace = "unknown"
+    job = new_job("unknown")
 
     try:
 
@@ -137,7 +338,7 @@ def jira_webhook():
             .get("name", "unknown")
         )
 
-        approved_by = webhook_user
+        job["approved_by"] = webhook_user
 
         logger.info(
             f"Webhook user={webhook_user}"
@@ -157,128 +358,382 @@ def jira_webhook():
                 "message": "ignored bot"
             }), 200
 
-        # --------------------------------
-        # Jira issue data
-        # --------------------------------
-
         issue = data.get("issue", {})
 
         issue_key = issue.get("key")
 
-        request_number = issue_key
-
-        issue_fields = issue.get(
-            "fields",
-            {}
-        )
+        if not read_issue(job, issue):
 
-        creator = (
-            issue_fields
-            .get("creator", {})
-            .get("name", "unknown")
-        )
+            return jsonify({
+                "message": "ignored"
+            }), 200
 
         # --------------------------------
-        # Current Jira status
+        # Enqueue provisioning job
         # --------------------------------
 
-        status_name = (
-            issue_fields
-            .get("status", {})
-            .get("name")
-        )
+        try:
 
-        logger.info(
-            f"Issue={issue_key} "
-            f"Status={status_name}"
-        )
+            queued_job, created = job_queue.submit(
+                issue_key,
+                job
+            )
 
-        # --------------------------------
-        # Run only when approved
-        # --------------------------------
+        except JobQueueFull as e:
 
-        if status_name != "تایید شده توسط ادمین کوبرنتیز":
+            logger.warning(str(e))
 
-            invalid_requests_total.labels(
-                reason="status_not_approved"
-            ).inc()
+            return jsonify({
+                "status": "busy",
+                "message": str(e)
+            }), 503
+
+        if not created:
 
             logger.info(
-                "Ignoring issue"
+                f"Job for {issue_key} already "
+                f"{queued_job.status}, not enqueued again"
             )
 
             return jsonify({
-                "message": "ignored"
+                "status": "duplicate",
+                "job": queued_job.to_dict()
             }), 200
 
+        return jsonify({
+            "status": "accepted",
+            "issue_key": issue_key,
+            "namespace": job["namespace"],
+            "job": f"/jobs/{issue_key}"
+        }), 202
+
+    except HTTPException:
+
+        raise
+
+    except Exception as e:
+
+        record_failure(job, e)
+
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+    finally:
+
+        active_requests.dec()
+
+
+# -----------------------------------
+# Job Status Endpoint
+# -----------------------------------
+
+@app.route("/jobs/<issue_key>")
+def job_status(issue_key):
+
+    queued_job = job_queue.get(issue_key)
+
+    if queued_job is not None:
+
+        return jsonify(
+            queued_job.to_dict()
+        ), 200
+
+    # --------------------------------
+    # Jobs live in the process that ran them,
+    # fall back to the request_number label
+    # --------------------------------
+
+    try:
+
+        namespace = namespace_cache.find_by_request(
+            issue_key
+        )
+
+    except ApiException as e:
+
+        return jsonify({
+            "issue_key": issue_key,
+            "status": "unknown",
+            "error": f"Kubernetes API error: {e.status}"
+        }), 503
+
+    if namespace:
+
+        return jsonify({
+            "issue_key": issue_key,
+            "status": "succeeded",
+            "result": {
+                "namespace": namespace
+            }
+        }), 200
+
+    return jsonify({
+        "issue_key": issue_key,
+        "status": "not_found"
+    }), 404
+
+
+# -----------------------------------
+# Bulk Provisioning Endpoint
+# -----------------------------------
+
+@app.route("/webhook/bulk", methods=["POST"])
+def bulk_provision():
+    """
+    Provision several approved issues in one request, given either as
+    {"issues": [...]} in webhook format or as {"jql": "..."}.
+
+    Every issue becomes a job on the provisioning queue, so at most
+    JOB_WORKERS namespaces (and their Jira calls) are in flight at once.
+    Waits up to BULK_TIMEOUT_SECONDS, then reports every issue with the
+    state its job reached.
+    """
+
+    active_requests.inc()
+
+    try:
+
         # --------------------------------
-        # Read Jira custom fields
+        # Validate webhook token
         # --------------------------------
 
-        site = issue_fields[
-            JIRA_FIELDS["site"]
-        ]["value"]
+        token = request.args.get("token")
+
+        if token != WEBHOOK_SECRET:
 
-        team = issue_fields[
-            JIRA_FIELDS["team"]
-        ]["value"]
+            webhook_auth_failures_total.inc()
 
-        project = issue_fields[
-            JIRA_FIELDS["project"]
-        ]
+            abort(401)
 
-        app_name = issue_fields[
-            JIRA_FIELDS["application"]
-        ]
+        data = request.get_json(silent=True)
+
+        if not isinstance(data, dict):
+
+            return jsonify({
+                "status": "error",
+                "message": "Body must be a JSON object"
+            }), 400
+
+        user = data.get("user")
+
+        approved_by = (
+            user.get("name", "unknown")
+            if isinstance(user, dict)
+            else "unknown"
+        )
+
+        started = time.monotonic()
 
         # --------------------------------
-        # Sanitize values
+        # Collect issues
         # --------------------------------
 
-        site = sanitize_name(site)
+        if data.get("jql"):
+
+            try:
+
+                issues = search_issues(
+                    data["jql"],
+                    BULK_MAX_ISSUES
+                )
+
+            except Exception as e:
+
+                logger.exception(e)
+
+                return jsonify({
+                    "status": "error",
+                    "message": str(e)
+                }), 502
+
+        else:
+
+            issues = data.get("issues", [])
 
-        team = sanitize_name(team)
+        if not isinstance(issues, list):
 
-        project = sanitize_name(project)
+            return jsonify({
+                "status": "error",
+                "message": "issues must be a list"
+            }), 400
+
+        if len(issues) > BULK_MAX_ISSUES:
 
-        app_name = sanitize_name(app_name)
+            return jsonify({
+                "status": "error",
+                "message": (
+                    f"At most {BULK_MAX_ISSUES} issues "
+                    f"per request, got {len(issues)}"
+                )
+            }), 400
 
         logger.info(
-            f"site={site} "
-            f"team={team} "
-            f"project={project} "
-            f"app={app_name} "
-            f"creator={creator} "
-            f"approved_by={approved_by} "
-            f"request_number={request_number}"
+            f"Bulk request user={approved_by} "
+            f"issues={len(issues)}"
         )
 
         # --------------------------------
-        # Request Metrics
+        # Enqueue one job per issue
         # --------------------------------
 
-        jira_requests_total.labels(
-            team=team,
-            project=project,
-            app=app_name,
-            creator=creator,
-            approved_by=approved_by,
-            status="approved"
-        ).inc()
+        results = {}
+        invalid = []
+        jobs = {}
+        namespaces = {}
+
+        for index, issue in enumerate(issues):
+
+            error = bulk_item_error(
+                issue,
+                results
+            )
+
+            if error:
+
+                issue_key = (
+                    issue.get("key")
+                    if isinstance(issue, dict)
+                    else None
+                )
+
+                invalid.append({
+                    "index": index,
+                    "issue_key": (
+                        issue_key
+                        if isinstance(issue_key, str)
+                        else None
+                    ),
+                    "status": "failed",
+                    "error": error
+                })
+
+                continue
+
+            issue_key = issue["key"]
+
+            job = new_job(approved_by)
+            handler = None
+
+            try:
+
+                if not read_issue(job, issue):
+
+                    results[issue_key] = {
+                        "issue_key": issue_key,
+                        "status": "ignored"
+                    }
+
+                    continue
+
+                # Two issues asking for the same
+                # namespace, the first one wins
+
+                first = namespaces.setdefault(
+                    job["namespace"],
+                    issue_key
+                )
+
+                if first != issue_key:
+
+                    duplicate_namespace_total.labels(
+                        team=job["team"],
+                        project=job["project"]
+                    ).inc()
+
+                    raise KubernetesError(
+                        f"Namespace '{job['namespace']}' is "
+                        f"also requested by {first}",
+                        error_type="AlreadyExists"
+                    )
+
+            except Exception as e:
+
+                # Rejected on a worker too, so the Jira
+                # transitions run alongside the others
+
+                job["error"] = e
+                handler = reject_issue
+
+            try:
+
+                jobs[issue_key], _ = job_queue.submit(
+                    issue_key,
+                    job,
+                    handler
+                )
+
+                results[issue_key] = None
+
+            except JobQueueFull as e:
+
+                results[issue_key] = {
+                    "issue_key": issue_key,
+                    "status": "busy",
+                    "error": str(e)
+                }
 
         # --------------------------------
-        # Generate namespace name
+        # Wait for the jobs
         # --------------------------------
 
-        namespace = generate_namespace_name(
-            team=team,
-            project=project,
-            app=app_name
-        )
+        deadline = started + BULK_TIMEOUT_SECONDS
 
-        logger.info(
-            f"Namespace={namespace}"
-        )
+        for issue_key, queued_job in jobs.items():
+
+            queued_job.done.wait(
+                max(0, deadline - time.monotonic())
+            )
+
+            results[issue_key] = queued_job.to_dict()
+
+        results = list(results.values()) + invalid
+
+        summary = {}
+
+        for result in results:
+
+            summary[result["status"]] = (
+                summary.get(result["status"], 0) + 1
+            )
+
+        return jsonify({
+            "summary": summary,
+            "elapsed_seconds": round(
+                time.monotonic() - started,
+                3
+            ),
+            "results": results
+        }), 200
+
+    finally:
+
+        active_requests.dec()
+
+
+# -----------------------------------
+# Provisioning Job
+# -----------------------------------
+
+def provision_namespace(job):
+    """
+    Create the namespace of an approved issue, then comment on and
+    transition the issue. Runs on a job queue worker, failures reject
+    the issue and are re-raised so the job is marked failed.
+    """
+
+    issue_key = job["issue_key"]
+    request_number = issue_key
+    site = job["site"]
+    team = job["team"]
+    project = job["project"]
+    app_name = job["app"]
+    creator = job["creator"]
+    approved_by = job["approved_by"]
+    namespace = job["namespace"]
+
+    try:
 
         # --------------------------------
         # Prevent duplicate namespace
@@ -286,16 +741,35 @@ def jira_webhook():
 
         try:
 
-            core_api.read_namespace(
+            labels = namespace_cache.labels(
                 namespace
             )
 
+        except ApiException as e:
+
+            # Only raised while the cache is not synced
+            # and the lookup went to the API server
+
+            kubernetes_api_errors_total.labels(
+                operation="read_namespace",
+                error_type=str(e.status),
+                team=team
+            ).inc()
+
+            raise
+
+        # A namespace already labelled with this issue is a retried
+        # webhook that reached another worker or replica, applying
+        # the manifest again converges it below
+
+        if (
+            labels is not None
+            and labels.get("request_number") != issue_key
+        ):
+
             duplicate_namespace_total.labels(
-                namespace=namespace,
                 team=team,
-                project=project,
-                app=app_name,
-                creator=creator
+                project=project
             ).inc()
 
             logger.error(
@@ -308,20 +782,6 @@ def jira_webhook():
                 error_type="AlreadyExists"
             )
 
-        except ApiException as e:
-
-            if e.status != 404:
-
-                kubernetes_api_errors_total.labels(
-                    operation="read_namespace",
-                    error_type=str(e.status),
-                    team=team,
-                    project=project,
-                    app=app_name
-                ).inc()
-
-                raise
-
         # --------------------------------
         # Render namespace manifest
         # --------------------------------
@@ -333,7 +793,9 @@ def jira_webhook():
                 project=project,
                 app=app_name,
                 site=site,
-                request_number=request_number
+                request_number=request_number,
+                creator=creator,
+                approved_by=approved_by
             )
         )
 
@@ -345,73 +807,87 @@ def jira_webhook():
         # Apply namespace
         # --------------------------------
 
-        apply_namespace_manifest(
-            namespace_manifest
-        )
+        try:
 
-        kubernetes_namespace_operations_total.labels(
-            operation="create",
-            namespace=namespace,
-            team=team,
-            project=project,
-            app=app_name,
-            result="success"
-        ).inc()
+            created = apply_namespace_manifest(
+                namespace_manifest
+            )
 
-        logger.info(
-            "Namespace created successfully"
-        )
+        except KubernetesError as e:
 
-        # --------------------------------
-        # Namespace Metadata Metric
-        # --------------------------------
+            # The cache had not seen it yet
 
-        namespace_info.labels(
-            namespace=namespace,
-            team=team,
-            project=project,
-            app=app_name,
-            site=site,
-            creator=creator,
-            approved_by=approved_by,
-            request_number=request_number
-        ).set(1)
+            if e.error_type == "AlreadyExists":
 
-        # --------------------------------
-        # Last Success Timestamp
-        # --------------------------------
+                duplicate_namespace_total.labels(
+                    team=team,
+                    project=project
+                ).inc()
 
-        last_namespace_creation_timestamp.labels(
-            namespace=namespace,
-            team=team,
-            project=project,
-            app=app_name
-        ).set(time.time())
+            raise
 
-        # --------------------------------
-        # Success Metrics
-        # --------------------------------
+        if created:
 
-        namespace_creation_success_total.labels(
-            team=team,
-            project=project,
-            app=app_name,
-            creator=creator,
-            approved_by=approved_by
-        ).inc()
+            kubernetes_namespace_operations_total.labels(
+                operation="create",
+                team=team,
+                project=project,
+                result="success"
+            ).inc()
 
-        # --------------------------------
-        # Processing Duration Metric
-        # --------------------------------
+            logger.info(
+                "Namespace created successfully"
+            )
 
-        request_processing_seconds.labels(
-            team=team,
-            project=project,
-            app=app_name,
-            status="success"
-        ).observe(
-            time.time() - start_time
-        )
+            # --------------------------------
+            # Success Metrics
+            # --------------------------------
+
+            namespace_creation_success_total.labels(
+                team=team,
+                project=project
+            ).inc()
+
+            # --------------------------------
+            # Processing Duration Metric
+            # --------------------------------
+
+            request_processing_seconds.labels(
+                team=team,
+                status="success"
+            ).observe(
+                time.time() - job["received_at"]
+            )
+
+        else:
+
+            # Provisioned earlier for this issue and applied
+            # again. The job that created it may have failed
+            # before updating Jira, so Jira is updated below
+            # unless the issue already left the approved status.
+
+            status_name = get_issue_status(
+                issue_key
+            )
+
+            if status_name != APPROVED_STATUS:
+
+                logger.info(
+                    f"Namespace {namespace} already "
+                    f"provisioned for {issue_key}, converged, "
+                    f"issue is {status_name}"
+                )
+
+                return {
+                    "namespace": namespace,
+                    "already_provisioned": True
+                }
+
+            logger.info(
+                f"Namespace {namespace} already "
+                f"provisioned for {issue_key}, converged, "
+                f"updating the issue"
+            )
 
         # --------------------------------
         # Jira success comment
@@ -431,8 +907,6 @@ def jira_webhook():
 
             jira_comments_total.labels(
                 team=team,
-                project=project,
-                app=app_name,
                 result="success"
             ).inc()
 
@@ -440,8 +914,6 @@ def jira_webhook():
 
             jira_comments_total.labels(
                 team=team,
-                project=project,
-                app=app_name,
                 result="failed"
             ).inc()
 
@@ -453,15 +925,13 @@ def jira_webhook():
 
             transition_issue(
                 issue_key,
-                "تایید درخواست"
+                "تایید درخواست",
+                **job["workflow"]
             )
 
             jira_transition_total.labels(
                 transition_name="approve",
                 team=team,
-                project=project,
-                app=app_name,
-                approved_by=approved_by,
                 result="success"
             ).inc()
 
@@ -470,9 +940,6 @@ def jira_webhook():
             jira_transition_total.labels(
                 transition_name="approve",
                 team=team,
-                project=project,
-                app=app_name,
-                approved_by=approved_by,
                 result="failed"
             ).inc()
 
@@ -482,116 +949,138 @@ def jira_webhook():
             "Issue transitioned successfully"
         )
 
-        return jsonify({
-            "status": "success",
-            "namespace": namespace
-        }), 200
+        return {
+            "namespace": namespace,
+            "already_provisioned": not created
+        }
 
     except Exception as e:
 
-        logger.exception(e)
+        record_failure(job, e)
 
-        error_message = str(e)
+        raise
 
-        if isinstance(e, KubernetesError):
-            error_type = e.error_type
-        elif isinstance(e, ApiException):
-            error_type = f"ApiException_{e.status}"
-        else:
-            error_type = type(e).__name__
 
-        # --------------------------------
-        # Failure Metrics
-        # --------------------------------
+def reject_issue(job):
+    """
+    Job handler for issues a bulk request could not accept.
+    """
 
-        namespace_creation_failed_total.labels(
-            team=team,
-            project=project,
-            app=app_name,
-            creator=creator,
-            approved_by=approved_by,
-            error_type=error_type
-        ).inc()
+    try:
 
-        # --------------------------------
-        # Kubernetes Errors Metrics
-        # --------------------------------
+        raise job["error"]
 
-        if isinstance(e, ApiException):
+    except Exception as e:
 
-            kubernetes_api_errors_total.labels(
-                operation="create_namespace",
-                error_type=str(e.status),
-                team=team,
-                project=project,
-                app=app_name
-            ).inc()
+        record_failure(job, e)
 
-        kubernetes_namespace_operations_total.labels(
-            operation="create",
-            namespace=namespace,
-            team=team,
-            project=project,
-            app=app_name,
-            result="failed"
+        raise
+
+
+def record_failure(job, e):
+    """
+    Failure metrics and the Jira reject transition.
+    """
+
+    logger.exception(e)
+
+    team = job["team"]
+    project = job["project"]
+
+    if isinstance(e, KubernetesError):
+        error_type = e.error_type
+    elif isinstance(e, ApiException):
+        error_type = f"ApiException_{e.status}"
+    else:
+        error_type = type(e).__name__
+
+    # --------------------------------
+    # Failure Metrics
+    # --------------------------------
+
+    namespace_creation_failed_total.labels(
+        team=team,
+        project=project,
+        error_type=error_type
+    ).inc()
+
+    # --------------------------------
+    # Kubernetes Errors Metrics
+    # --------------------------------
+
+    if isinstance(e, ApiException):
+
+        kubernetes_api_errors_total.labels(
+            operation="create_namespace",
+            error_type=str(e.status),
+            team=team
         ).inc()
 
-        # --------------------------------
-        # Processing Duration Metric
-        # --------------------------------
+    kubernetes_namespace_operations_total.labels(
+        operation="create",
+        team=team,
+        project=project,
+        result="failed"
+    ).inc()
 
-        request_processing_seconds.labels(
-            team=team,
-            project=project,
-            app=app_name,
-            status="failed"
-        ).observe(
-            time.time() - start_time
-        )
+    # --------------------------------
+    # Processing Duration Metric
+    # --------------------------------
 
-        # --------------------------------
-        # Jira failure transition
-        # --------------------------------
+    request_processing_seconds.labels(
+        team=team,
+        status="failed"
+    ).observe(
+        time.time() - job["received_at"]
+    )
 
-        try:
+    # --------------------------------
+    # Jira failure transition
+    # --------------------------------
 
-            transition_issue(
-                issue_key,
-                "رد شدن درخواست"
-            )
+    try:
 
-            jira_transition_total.labels(
-                transition_name="reject",
-                team=team,
-                project=project,
-                app=app_name,
-                approved_by=approved_by,
-                result="success"
-            ).inc()
+        transition_issue(
+            job["issue_key"],
+            "رد شدن درخواست",
+            **job["workflow"]
+        )
+
+        jira_transition_total.labels(
+            transition_name="reject",
+            team=team,
+            result="success"
+        ).inc()
 
-        except Exception as jira_error:
+    except Exception as jira_error:
 
-            logger.exception(
-                jira_error
-            )
+        logger.exception(
+            jira_error
+        )
 
-            jira_transition_total.labels(
-                transition_name="reject",
-                team=team,
-                project=project,
-                app=app_name,
-                approved_by=approved_by,
-                result="failed"
-            ).inc()
+        jira_transition_total.labels(
+            transition_name="reject",
+            team=team,
+            result="failed"
+        ).inc()
 
-        return jsonify({
-            "status": "error",
-            "message": error_message
-        }), 500
 
-    finally:
+namespace_cache = NamespaceCache(
+    enabled=NAMESPACE_CACHE_ENABLED,
+    timeout=NAMESPACE_WATCH_TIMEOUT_SECONDS,
+    retention=METRICS_NAMESPACE_TTL_SECONDS
+)
 
-        active_requests.dec()
+namespace_collector.source = (
+    namespace_cache.provisioned_namespaces
+)
+
+job_queue = JobQueue(
+    handler=provision_namespace,
+    workers=JOB_WORKERS,
+    size=JOB_QUEUE_SIZE,
+    retention=JOB_RETENTION_SECONDS
+)
 
 
 # -----------------------------------
@@ -1,14 +1,23 @@
-from jira import JIRA
-from config import JIRA_URL, JIRA_TOKEN
+import time
+
+from jira import JIRA, JIRAError
+from config import JIRA_URL, JIRA_TOKEN, JIRA_TRANSITION_CACHE_TTL, JIRA_FIELDS
 from threading import Lock
 from requests.exceptions import RequestException
 
+from services.logger_service import logger
+from services.metrics_service import jira_transition_cache_total
+
 # -----------------------------
 # Global state (lazy init)
 # -----------------------------
 _jira_client = None
 _lock = Lock()
 
+# (project, issue type, status) -> (expires_at, {name: id})
+_transition_cache = {}
+_transition_lock = Lock()
+
 
 def get_client():
     """
@@ -58,27 +67,169 @@ def add_comment(issue_key: str, comment: str):
         raise Exception(f"Failed to add comment: {str(e)}")
 
 
+# -----------------------------
+# Issue status
+# -----------------------------
+def get_issue_status(issue_key: str) -> str:
+    """
+    Current workflow status name of an issue.
+    """
+
+    client = get_client()
+
+    try:
+        issue = client.issue(issue_key, fields="status")
+
+    except (JIRAError, RequestException) as e:
+        raise Exception(f"Failed to read issue: {str(e)}")
+
+    return issue.fields.status.name
+
+
+# -----------------------------
+# Search issues
+# -----------------------------
+def search_issues(jql: str, max_results: int):
+    """
+    Raw issues matching ``jql``, with only the fields provisioning reads.
+    """
+
+    client = get_client()
+
+    fields = [
+        "status",
+        "creator",
+        "project",
+        "issuetype"
+    ] + list(JIRA_FIELDS.values())
+
+    try:
+        result = client.search_issues(
+            jql,
+            maxResults=max_results,
+            fields=fields,
+            json_result=True
+        )
+
+    except (JIRAError, RequestException) as e:
+        raise Exception(f"Failed to search issues: {str(e)}")
+
+    return result.get("issues", [])
+
+
+# -----------------------------
+# Transition ID cache
+# -----------------------------
+def _cached_transitions(workflow_key):
+
+    if None in workflow_key:
+        return None
+
+    with _transition_lock:
+        entry = _transition_cache.get(workflow_key)
+
+    if entry is None or entry[0] < time.monotonic():
+        return None
+
+    return entry[1]
+
+
+def _load_transitions(client, issue_key: str, workflow_key):
+    """
+    Fetch the transitions available on the issue by key and cache them
+    for every issue in the same project, issue type and status.
+    """
+
+    transitions = {
+        t.get("name"): t.get("id")
+        for t in client.transitions(issue_key)
+    }
+
+    if None not in workflow_key:
+        with _transition_lock:
+            _transition_cache[workflow_key] = (
+                time.monotonic() + JIRA_TRANSITION_CACHE_TTL,
+                transitions
+            )
+
+    return transitions
+
+
+def clear_transition_cache():
+    with _transition_lock:
+        _transition_cache.clear()
+
+
 # -----------------------------
 # Transition issue
 # -----------------------------
-def transition_issue(issue_key: str, transition_name: str):
+def transition_issue(
+    issue_key: str,
+    transition_name: str,
+    project: str = None,
+    issue_type: str = None,
+    status: str = None
+):
+    """
+    POST a transition by name without fetching the issue.
+
+    Transition IDs only depend on the workflow step, so they are cached
+    per (project, issue type, status) for JIRA_TRANSITION_CACHE_TTL
+    seconds. A miss, or a cached ID Jira rejects, refreshes the entry
+    from the issue's transitions. Without the workflow key the
+    transitions are looked up on every call.
+    """
+
     client = get_client()
 
-    issue = client.issue(issue_key)
-    transitions = client.transitions(issue)
+    workflow_key = (project, issue_type, status)
+
+    transitions = _cached_transitions(workflow_key)
 
-    transition_id = None
+    cached = transitions is not None and transition_name in transitions
 
-    for t in transitions:
-        if t.get("name") == transition_name:
-            transition_id = t.get("id")
-            break
+    jira_transition_cache_total.labels(
+        result="hit" if cached else "miss"
+    ).inc()
+
+    if not cached:
+        transitions = _load_transitions(client, issue_key, workflow_key)
+
+    transition_id = transitions.get(transition_name)
 
     if not transition_id:
         raise Exception(f"Transition '{transition_name}' not found")
 
     try:
-        client.transition_issue(issue, transition_id)
+        client.transition_issue(issue_key, transition_id)
+
+    except JIRAError as e:
+
+        if not cached or e.status_code != 400:
+            raise Exception(f"Failed to transition issue: {str(e)}")
+
+        # The workflow changed since the ID was cached
+        jira_transition_cache_total.labels(
+            result="stale"
+        ).inc()
+
+        logger.info(
+            f"Cached transition '{transition_name}' rejected "
+            f"for {issue_key}, refreshing"
+        )
+
+        transitions = _load_transitions(client, issue_key, workflow_key)
+
+        transition_id = transitions.get(transition_name)
+
+        if not transition_id:
+            raise Exception(f"Transition '{transition_name}' not found")
+
+        try:
+            client.transition_issue(issue_key, transition_id)
+
+        except (JIRAError, RequestException) as e:
+            raise Exception(f"Failed to transition issue: {str(e)}")
 
     except RequestException as e:
         raise Exception(f"Failed to transition issue: {str(e)}")
\ No newline at end of file
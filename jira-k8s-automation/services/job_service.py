@@ -0,0 +1,291 @@
+import os
+import time
+import queue
+import threading
+
+from services.exceptions import JobQueueFull
+from services.logger_service import logger
+
+from services.metrics_service import (
+    provisioning_jobs_in_flight,
+    provisioning_jobs_total,
+    provisioning_job_wait_seconds
+)
+
+
+# -----------------------------------
+# Job states
+# -----------------------------------
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# A new webhook for the same issue key is
+# only accepted once the previous job failed
+
+ACTIVE_STATES = (
+    QUEUED,
+    RUNNING,
+    SUCCEEDED
+)
+
+
+class Job:
+
+    def __init__(self, key, payload, handler):
+
+        self.key = key
+        self.payload = payload
+        self.handler = handler
+        self.done = threading.Event()
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+
+        return {
+            "issue_key": self.key,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+# -----------------------------------
+# Job queue
+# -----------------------------------
+
+class JobQueue:
+    """
+    Bounded queue of provisioning jobs run by a pool of worker threads.
+
+    Jobs are keyed by Jira issue key: submitting a key whose job is
+    queued, running or succeeded returns the existing job instead of
+    running the work twice. Finished jobs are kept for ``retention``
+    seconds so their status can still be queried.
+
+    Workers start lazily in the process that submits the first job,
+    threads started before gunicorn forks would not exist in workers.
+    """
+
+    def __init__(
+        self,
+        handler,
+        workers=4,
+        size=100,
+        retention=3600
+    ):
+
+        self.handler = handler
+        self.workers = workers
+        self.retention = retention
+        self.queue = queue.Queue(maxsize=size)
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.pid = None
+        self.threads = []
+
+    def _ensure_started(self):
+
+        if self.pid == os.getpid():
+            return
+
+        self.pid = os.getpid()
+
+        self.threads = [
+            threading.Thread(
+                target=self._worker,
+                name=f"provisioning-{i}",
+                daemon=True
+            )
+            for i in range(self.workers)
+        ]
+
+        for thread in self.threads:
+            thread.start()
+
+        logger.info(
+            f"Started {self.workers} provisioning workers"
+        )
+
+    def submit(self, key, payload, handler=None):
+        """
+        Enqueue a job for ``key`` unless one is already active.
+
+        ``handler`` replaces the queue's handler for this job only.
+        Returns (job, created), raises JobQueueFull.
+        """
+
+        with self.lock:
+
+            self._ensure_started()
+
+            self._expire()
+
+            job = self.jobs.get(key)
+
+            if job is not None and job.status in ACTIVE_STATES:
+
+                provisioning_jobs_total.labels(
+                    result="duplicate"
+                ).inc()
+
+                return job, False
+
+            job = Job(
+                key,
+                payload,
+                handler or self.handler
+            )
+
+            try:
+
+                self.queue.put_nowait(job)
+
+            except queue.Full:
+
+                provisioning_jobs_total.labels(
+                    result="queue_full"
+                ).inc()
+
+                raise JobQueueFull(
+                    f"Provisioning queue is full ({self.queue.maxsize} jobs)"
+                )
+
+            self.jobs[key] = job
+
+        provisioning_jobs_in_flight.labels(
+            state=QUEUED
+        ).inc()
+
+        provisioning_jobs_total.labels(
+            result="enqueued"
+        ).inc()
+
+        return job, True
+
+    def get(self, key):
+
+        with self.lock:
+            return self.jobs.get(key)
+
+    def _expire(self):
+
+        cutoff = time.time() - self.retention
+
+        expired = [
+            key
+            for key, job in self.jobs.items()
+            if job.finished_at is not None
+            and job.finished_at < cutoff
+        ]
+
+        for key in expired:
+            del self.jobs[key]
+
+    def _worker(self):
+
+        while True:
+
+            job = self.queue.get()
+
+            if job is None:
+                self.queue.task_done()
+                return
+
+            self._run(job)
+
+            self.queue.task_done()
+
+    def _run(self, job):
+
+        job.started_at = time.time()
+        job.status = RUNNING
+
+        provisioning_job_wait_seconds.observe(
+            job.started_at - job.created_at
+        )
+
+        provisioning_jobs_in_flight.labels(
+            state=QUEUED
+        ).dec()
+
+        provisioning_jobs_in_flight.labels(
+            state=RUNNING
+        ).inc()
+
+        try:
+
+            job.result = job.handler(
+                job.payload
+            )
+
+            job.status = SUCCEEDED
+
+        except Exception as e:
+
+            job.error = str(e)
+            job.status = FAILED
+
+        finally:
+
+            job.finished_at = time.time()
+
+            provisioning_jobs_in_flight.labels(
+                state=RUNNING
+            ).dec()
+
+            provisioning_jobs_total.labels(
+                result=job.status
+            ).inc()
+
+            job.done.set()
+
+    def shutdown(self, timeout):
+        """
+        Let the workers finish queued jobs for up to ``timeout`` seconds.
+        """
+
+        if self.pid != os.getpid():
+            return
+
+        deadline = time.monotonic() + timeout
+
+        try:
+
+            for _ in self.threads:
+                self.queue.put(
+                    None,
+                    timeout=max(0.01, deadline - time.monotonic())
+                )
+
+        except queue.Full:
+            pass
+
+        for thread in self.threads:
+            thread.join(
+                max(0, deadline - time.monotonic())
+            )
+
+        with self.lock:
+
+            left = sum(
+                1
+                for job in self.jobs.values()
+                if job.status in (QUEUED, RUNNING)
+            )
+
+        if left:
+
+            logger.warning(
+                f"Stopped with {left} provisioning jobs still queued"
+            )
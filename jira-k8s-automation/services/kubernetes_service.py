@@ -1,12 +1,20 @@
-import yaml
 import logging
 
+from datetime import datetime
+
+from concurrent.futures import ThreadPoolExecutor
+
 from kubernetes import client, config
 
 from kubernetes.client.rest import ApiException
 from services.exceptions import KubernetesError
 
-from config import KUBECONFIG_PATH
+from config import (
+    KUBECONFIG_PATH,
+    JOB_WORKERS,
+    KUBERNETES_FIELD_MANAGER,
+    KUBERNETES_APPLY_CONCURRENCY
+)
 
 
 logger = logging.getLogger(__name__)
@@ -53,81 +61,310 @@ def load_kubernetes_config():
 
 load_kubernetes_config()
 
+# Every job worker may apply several objects at
+# once, keep their connections in the pool
+
+configuration = client.Configuration.get_default_copy()
+
+configuration.connection_pool_maxsize = max(
+    configuration.connection_pool_maxsize,
+    JOB_WORKERS * KUBERNETES_APPLY_CONCURRENCY
+)
+
+client.Configuration.set_default(configuration)
+
 core_api = client.CoreV1Api()
 
 
+# -----------------------------------
+# Namespace ownership
+# -----------------------------------
+
+def get_namespace_labels(name: str):
+    """
+    Labels of an existing namespace, None when it does not exist.
+    """
+
+    try:
+
+        namespace = core_api.read_namespace(name)
+
+    except ApiException as e:
+
+        if e.status == 404:
+            return None
+
+        raise
+
+    return namespace.metadata.labels or {}
+
+
+def find_namespace_by_request(request_number: str):
+    """
+    Name of the namespace provisioned for a Jira issue, if any.
+    """
+
+    namespaces = core_api.list_namespace(
+        label_selector=f"request_number={request_number}"
+    )
+
+    for namespace in namespaces.items:
+        return namespace.metadata.name
+
+    return None
+
+
+def timestamp(value):
+    """
+    Unix time of a Kubernetes timestamp, a datetime or the RFC 3339
+    string of a raw object. 0 when missing.
+    """
+
+    if isinstance(value, str):
+        value = datetime.fromisoformat(
+            value.replace("Z", "+00:00")
+        )
+
+    return value.timestamp() if value else 0
+
+
+def provisioned_record(name, labels, annotations, created):
+    """
+    What metrics need about a namespace carrying a request_number.
+    ``deleted`` is set by the namespace cache once it is gone.
+    """
+
+    return {
+        "name": name,
+        "labels": labels,
+        "annotations": annotations or {},
+        "created": timestamp(created),
+        "deleted": None
+    }
+
+
+def list_provisioned_namespaces():
+    """
+    Every namespace carrying a request_number label, for metrics.
+    """
+
+    namespaces = core_api.list_namespace(
+        label_selector="request_number"
+    )
+
+    return [
+        provisioned_record(
+            namespace.metadata.name,
+            namespace.metadata.labels,
+            namespace.metadata.annotations,
+            namespace.metadata.creation_timestamp
+        )
+        for namespace in namespaces.items
+    ]
+
+
 # -----------------------------------
 # Apply Namespace Manifest
 # -----------------------------------
 
+# Server-side apply path per kind. The Namespace is
+# created first, the others live in it and are
+# applied concurrently.
+
+APPLY_PATHS = {
+    "Namespace": "/api/v1/namespaces/{name}",
+    "ResourceQuota": "/api/v1/namespaces/{namespace}/resourcequotas/{name}",
+    "LimitRange": "/api/v1/namespaces/{namespace}/limitranges/{name}",
+    "RoleBinding": "/apis/rbac.authorization.k8s.io/v1/namespaces/{namespace}/rolebindings/{name}",
+    "NetworkPolicy": "/apis/networking.k8s.io/v1/namespaces/{namespace}/networkpolicies/{name}"
+}
+
+
 def apply_namespace_manifest(
-    manifest: str
+    manifest: list
 ):
+    """
+    Create the Namespace, then server-side apply every other object.
 
-    docs = list(
-        yaml.safe_load_all(manifest)
-    )
+    Idempotent: when the namespace already exists with this manifest's
+    request_number it is applied too and everything converges, another
+    request_number raises AlreadyExists. Returns True when the namespace
+    was created by this call.
+    """
 
-    for doc in docs:
+    namespace = None
+    objects = []
 
-        if not doc:
-            continue
+    for doc in manifest:
 
         kind = doc.get("kind")
 
-        logger.info(
-            f"Processing resource kind={kind}"
-        )
-
         if kind == "Namespace":
+            namespace = doc
 
-            create_namespace(doc)
+        elif kind in APPLY_PATHS:
+            objects.append(doc)
 
         else:
-
             logger.warning(
                 f"Unsupported kind: {kind}"
             )
 
+    if namespace is None:
+        raise KubernetesError(
+            "Manifest has no Namespace",
+            error_type="InvalidManifest"
+        )
+
+    created = create_namespace(namespace)
+
+    # An existing namespace is applied
+    # alongside the objects inside it
+
+    if not created:
+        objects.append(namespace)
+
+    if not objects:
+        return created
+
+    # --------------------------------
+    # Objects inside the namespace
+    # --------------------------------
+
+    errors = []
+
+    with ThreadPoolExecutor(
+        max_workers=min(len(objects), KUBERNETES_APPLY_CONCURRENCY)
+    ) as pool:
+
+        futures = [
+            pool.submit(apply_object, doc)
+            for doc in objects
+        ]
+
+        for future in futures:
+
+            try:
+                future.result()
+
+            except KubernetesError as e:
+                errors.append(e)
+
+    if errors:
+        raise errors[0]
+
+    return created
+
 
 # -----------------------------------
 # Namespace
 # -----------------------------------
 
 def create_namespace(body: dict):
+    """
+    Create the namespace, False when it already exists for the same
+    request_number.
+    """
 
     metadata = body.get("metadata", {})
     name = metadata.get("name")
 
-    try:
-        core_api.read_namespace(name)
+    logger.info(
+        f"Processing resource kind=Namespace name={name}"
+    )
 
-        raise KubernetesError(
-            message=f"Namespace '{namespace}' already exists",
-            error_type="AlreadyExists"
+    # No read first: the caller checked the namespace
+    # cache and a 409 here is the authoritative answer
+
+    try:
+        core_api.create_namespace(
+            body=body,
+            field_manager=KUBERNETES_FIELD_MANAGER
         )
 
+        return True
+
     except ApiException as e:
 
-        if e.status == 404:
-            pass
-        else:
+        if e.status != 409:
             raise KubernetesError(
-                f"Kubernetes API error: {str(e)}",
-                error_type=f"ApiException_{e.status}"
+                str(e),
+                error_type=f"CreateFailed_{e.status}"
             )
 
-    except Exception as e:
-        raise KubernetesError(
-            str(e),
-            error_type=type(e).__name__
+    # A retry, or a concurrent job for the same issue.
+    # Apply over it only when it carries our request.
+
+    request_number = (
+        metadata.get("labels", {})
+        .get("request_number")
+    )
+
+    labels = get_namespace_labels(name) or {}
+
+    if (
+        request_number is not None
+        and labels.get("request_number") == request_number
+    ):
+
+        logger.info(
+            f"Namespace '{name}' exists for {request_number}, converging"
         )
 
+        return False
+
+    raise KubernetesError(
+        message=f"Namespace '{name}' already exists",
+        error_type="AlreadyExists"
+    )
+
+
+# -----------------------------------
+# Server-side apply
+# -----------------------------------
+
+def apply_object(body: dict):
+    """
+    Server-side apply ``body`` as our field manager, creating it if needed.
+
+    Conflicting fields owned by another manager are taken over, these
+    objects belong to the namespace this service provisions.
+    """
+
+    kind = body.get("kind")
+    metadata = body.get("metadata", {})
+
+    logger.info(
+        f"Processing resource kind={kind} name={metadata.get('name')}"
+    )
+
+    path = APPLY_PATHS[kind].format(
+        namespace=metadata.get("namespace"),
+        name=metadata.get("name")
+    )
+
     try:
-        core_api.create_namespace(body=body)
+
+        core_api.api_client.call_api(
+            path,
+            "PATCH",
+            query_params=[
+                ("fieldManager", KUBERNETES_FIELD_MANAGER),
+                ("force", "true")
+            ],
+            header_params={
+                "Accept": "application/json",
+                "Content-Type": "application/apply-patch+yaml"
+            },
+            body=body,
+            response_type="object",
+            auth_settings=["BearerToken"],
+            _return_http_data_only=True
+        )
 
     except ApiException as e:
+
         raise KubernetesError(
             str(e),
-            error_type=f"CreateFailed_{e.status}"
-        )
\ No newline at end of file
+            error_type=f"ApplyFailed_{e.status}"
+        )
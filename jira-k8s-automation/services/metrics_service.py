@@ -1,43 +1,138 @@
+import os
+import gzip
+import time
+import hashlib
+import threading
+
 from prometheus_client import Counter
 from prometheus_client import Histogram
 from prometheus_client import Gauge
 from prometheus_client import Info
 from prometheus_client import generate_latest
+from prometheus_client import CollectorRegistry
 from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import REGISTRY
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+from config import (
+    PROMETHEUS_MULTIPROC_DIR,
+    GUNICORN_WORKERS,
+    METRICS_MAX_SERIES,
+    METRICS_NAMESPACE_TTL_SECONDS,
+    METRICS_CACHE_SECONDS
+)
+
+from services.logger_service import logger
 
 
 # -----------------------------------
-# Total Jira webhook requests
+# Series limits
+#
+# Counters and histograms only carry labels with a
+# bounded set of values. Per-namespace identity
+# (namespace, creator, approved_by, request_number)
+# lives in namespace_info alone.
 # -----------------------------------
 
-jira_requests_total = Counter(
-    "jira_requests_total",
-    "Total Jira webhook requests",
+OVERFLOW = "overflow"
+
+# Every gunicorn worker keeps its own label sets, the
+# limit is split between them so the scraped total
+# stays within METRICS_MAX_SERIES
+
+SERIES_PER_PROCESS = (
+    max(1, METRICS_MAX_SERIES // max(1, GUNICORN_WORKERS))
+    if PROMETHEUS_MULTIPROC_DIR
+    else METRICS_MAX_SERIES
+)
+
+metrics_series_overflow_total = Counter(
+    "metrics_series_overflow_total",
+    "Observations folded into an overflow series once a metric hit its series limit",
     [
-        "team",
-        "project",
-        "app",
-        "creator",
-        "approved_by",
-        "status"
+        "metric"
     ]
 )
 
 
+class SeriesLimit:
+    """
+    A labelled metric that creates at most ``limit`` label sets per
+    process, METRICS_MAX_SERIES shared out over the gunicorn workers by
+    default. Once full, observations for new label sets go to a series
+    whose labels outside ``bounded`` read "overflow", so totals stay
+    right while the series count stops growing.
+    """
+
+    def __init__(
+        self,
+        metric,
+        bounded=(),
+        limit=SERIES_PER_PROCESS
+    ):
+
+        self.metric = metric
+        self.name = metric.describe()[0].name
+        self.bounded = set(bounded)
+        self.limit = limit
+        self.series = set()
+        self.lock = threading.Lock()
+
+    def labels(self, **labels):
+
+        key = tuple(sorted(labels.items()))
+
+        with self.lock:
+
+            if key in self.series or len(self.series) < self.limit:
+
+                self.series.add(key)
+
+                return self.metric.labels(**labels)
+
+        metrics_series_overflow_total.labels(
+            metric=self.name
+        ).inc()
+
+        return self.metric.labels(**{
+            name: value if name in self.bounded else OVERFLOW
+            for name, value in labels.items()
+        })
+
+
+# -----------------------------------
+# Total Jira webhook requests
+# -----------------------------------
+
+jira_requests_total = SeriesLimit(
+    Counter(
+        "jira_requests_total",
+        "Total Jira webhook requests",
+        [
+            "team",
+            "project",
+            "status"
+        ]
+    ),
+    bounded=["team", "status"]
+)
+
+
 # -----------------------------------
 # Namespace creation success
 # -----------------------------------
 
-namespace_creation_success_total = Counter(
-    "namespace_creation_success_total",
-    "Successful namespace creations",
-    [
-        "team",
-        "project",
-        "app",
-        "creator",
-        "approved_by"
-    ]
+namespace_creation_success_total = SeriesLimit(
+    Counter(
+        "namespace_creation_success_total",
+        "Successful namespace creations",
+        [
+            "team",
+            "project"
+        ]
+    ),
+    bounded=["team"]
 )
 
 
@@ -45,17 +140,17 @@ namespace_creation_success_total = Counter(
 # Namespace creation failures
 # -----------------------------------
 
-namespace_creation_failed_total = Counter(
-    "namespace_creation_failed_total",
-    "Failed namespace creations",
-    [
-        "team",
-        "project",
-        "app",
-        "creator",
-        "approved_by",
-        "error_type"
-    ]
+namespace_creation_failed_total = SeriesLimit(
+    Counter(
+        "namespace_creation_failed_total",
+        "Failed namespace creations",
+        [
+            "team",
+            "project",
+            "error_type"
+        ]
+    ),
+    bounded=["team", "error_type"]
 )
 
 
@@ -63,16 +158,17 @@ namespace_creation_failed_total = Counter(
 # Kubernetes API errors
 # -----------------------------------
 
-kubernetes_api_errors_total = Counter(
-    "kubernetes_api_errors_total",
-    "Kubernetes API errors",
-    [
-        "operation",
-        "error_type",
-        "team",
-        "project",
-        "app"
-    ]
+kubernetes_api_errors_total = SeriesLimit(
+    Counter(
+        "kubernetes_api_errors_total",
+        "Kubernetes API errors",
+        [
+            "operation",
+            "error_type",
+            "team"
+        ]
+    ),
+    bounded=["operation", "error_type", "team"]
 )
 
 
@@ -80,17 +176,18 @@ kubernetes_api_errors_total = Counter(
 # Kubernetes namespace operations
 # -----------------------------------
 
-kubernetes_namespace_operations_total = Counter(
-    "kubernetes_namespace_operations_total",
-    "Kubernetes namespace operations",
-    [
-        "operation",
-        "namespace",
-        "team",
-        "project",
-        "app",
-        "result"
-    ]
+kubernetes_namespace_operations_total = SeriesLimit(
+    Counter(
+        "kubernetes_namespace_operations_total",
+        "Kubernetes namespace operations",
+        [
+            "operation",
+            "team",
+            "project",
+            "result"
+        ]
+    ),
+    bounded=["operation", "team", "result"]
 )
 
 
@@ -98,27 +195,28 @@ kubernetes_namespace_operations_total = Counter(
 # Request processing duration
 # -----------------------------------
 
-request_processing_seconds = Histogram(
-    "request_processing_seconds",
-    "Webhook processing duration in seconds",
-    [
-        "team",
-        "project",
-        "app",
-        "status"
-    ],
-    buckets=(
-        0.1,
-        0.3,
-        0.5,
-        1,
-        2,
-        5,
-        10,
-        20,
-        30,
-        60
-    )
+request_processing_seconds = SeriesLimit(
+    Histogram(
+        "request_processing_seconds",
+        "Webhook processing duration in seconds",
+        [
+            "team",
+            "status"
+        ],
+        buckets=(
+            0.1,
+            0.3,
+            0.5,
+            1,
+            2,
+            5,
+            10,
+            20,
+            30,
+            60
+        )
+    ),
+    bounded=["status"]
 )
 
 
@@ -128,59 +226,175 @@ request_processing_seconds = Histogram(
 
 active_requests = Gauge(
     "active_requests",
-    "Currently processing webhook requests"
+    "Currently processing webhook requests",
+    multiprocess_mode="livesum"
 )
 
 
 # -----------------------------------
-# Namespace info metric
-# -----------------------------------
+# Namespace info and creation timestamp
+# -----------------------------------
+
+class NamespaceCollector:
+    """
+    namespace_info and last_namespace_creation_timestamp, built at
+    scrape time from ``source``: a callable returning the provisioned
+    namespaces as dicts with their labels, annotations, creation and
+    deletion time (the namespace cache).
+
+    Existing namespaces are always reported, deleted ones until ``ttl``
+    seconds after their deletion. At most ``limit`` are exported,
+    existing ones first, then the newest. Every gunicorn worker follows
+    the same cluster, so whichever one answers a scrape reports the
+    same series.
+    """
+
+    def __init__(
+        self,
+        ttl=METRICS_NAMESPACE_TTL_SECONDS,
+        limit=METRICS_MAX_SERIES
+    ):
+
+        self.ttl = ttl
+        self.limit = limit
+        self.source = None
+
+    def collect(self):
+
+        info = GaugeMetricFamily(
+            "namespace_info",
+            "Namespace metadata information",
+            labels=[
+                "namespace",
+                "team",
+                "project",
+                "app",
+                "site",
+                "creator",
+                "approved_by",
+                "request_number"
+            ]
+        )
+
+        created = GaugeMetricFamily(
+            "last_namespace_creation_timestamp",
+            "Unix timestamp of namespace creation",
+            labels=[
+                "namespace",
+                "team",
+                "project",
+                "app"
+            ]
+        )
+
+        namespaces = self.source() if self.source else []
+
+        cutoff = time.time() - self.ttl
+
+        recent = sorted(
+            (
+                namespace
+                for namespace in namespaces
+                if namespace.get("deleted") is None
+                or namespace["deleted"] >= cutoff
+            ),
+            key=lambda namespace: (
+                namespace.get("deleted") is None,
+                namespace["created"]
+            ),
+            reverse=True
+        )[:self.limit]
+
+        for namespace in recent:
+
+            labels = namespace["labels"]
+            annotations = namespace["annotations"]
+
+            info.add_metric(
+                [
+                    namespace["name"],
+                    labels.get("team", ""),
+                    labels.get("project", ""),
+                    labels.get("application", ""),
+                    labels.get("site", ""),
+                    annotations.get("jira-k8s-automation/creator", ""),
+                    annotations.get("jira-k8s-automation/approved-by", ""),
+                    labels.get("request_number", "")
+                ],
+                1
+            )
+
+            created.add_metric(
+                [
+                    namespace["name"],
+                    labels.get("team", ""),
+                    labels.get("project", ""),
+                    labels.get("application", "")
+                ],
+                namespace["created"]
+            )
+
+        yield info
+
+        yield created
+
+
+namespace_collector = NamespaceCollector()
+
+REGISTRY.register(namespace_collector)
+
+
+# -----------------------------------
+# Namespace cache
+# -----------------------------------
+
+namespace_cache_synced = Gauge(
+    "namespace_cache_synced",
+    "1 once the namespace cache listed the cluster and follows its watch",
+    multiprocess_mode="livemin"
+)
+
+namespace_cache_size = Gauge(
+    "namespace_cache_size",
+    "Namespaces held in the local namespace cache",
+    multiprocess_mode="livemax"
+)
 
-namespace_info = Gauge(
-    "namespace_info",
-    "Namespace metadata information",
+namespace_cache_watch_restarts_total = Counter(
+    "namespace_cache_watch_restarts_total",
+    "Namespace watch restarts",
     [
-        "namespace",
-        "team",
-        "project",
-        "app",
-        "site",
-        "creator",
-        "approved_by",
-        "request_number"
+        "reason"
     ]
 )
 
 
 # -----------------------------------
-# Last namespace creation timestamp
+# Jira transition operations
 # -----------------------------------
 
-last_namespace_creation_timestamp = Gauge(
-    "last_namespace_creation_timestamp",
-    "Unix timestamp of last successful namespace creation",
-    [
-        "namespace",
-        "team",
-        "project",
-        "app"
-    ]
+jira_transition_total = SeriesLimit(
+    Counter(
+        "jira_transition_total",
+        "Jira workflow transitions",
+        [
+            "transition_name",
+            "team",
+            "result"
+        ]
+    ),
+    bounded=["transition_name", "result"]
 )
 
 
 # -----------------------------------
-# Jira transition operations
+# Jira transition ID cache
 # -----------------------------------
 
-jira_transition_total = Counter(
-    "jira_transition_total",
-    "Jira workflow transitions",
+jira_transition_cache_total = Counter(
+    "jira_transition_cache_total",
+    "Jira transition ID lookups by cache result",
     [
-        "transition_name",
-        "team",
-        "project",
-        "app",
-        "approved_by",
         "result"
     ]
 )
@@ -190,15 +404,16 @@ jira_transition_total = Counter(
 # Jira comments operations
 # -----------------------------------
 
-jira_comments_total = Counter(
-    "jira_comments_total",
-    "Jira comment operations",
-    [
-        "team",
-        "project",
-        "app",
-        "result"
-    ]
+jira_comments_total = SeriesLimit(
+    Counter(
+        "jira_comments_total",
+        "Jira comment operations",
+        [
+            "team",
+            "result"
+        ]
+    ),
+    bounded=["result"]
 )
 
 
@@ -206,16 +421,16 @@ jira_comments_total = Counter(
 # Duplicate namespace detection
 # -----------------------------------
 
-duplicate_namespace_total = Counter(
-    "duplicate_namespace_total",
-    "Duplicate namespace requests",
-    [
-        "namespace",
-        "team",
-        "project",
-        "app",
-        "creator"
-    ]
+duplicate_namespace_total = SeriesLimit(
+    Counter(
+        "duplicate_namespace_total",
+        "Duplicate namespace requests",
+        [
+            "team",
+            "project"
+        ]
+    ),
+    bounded=["team"]
 )
 
 
@@ -243,30 +458,278 @@ webhook_auth_failures_total = Counter(
 
 
 # -----------------------------------
-# Flask app info
+# Provisioning jobs
 # -----------------------------------
 
-application_info = Info(
-    "application_info",
-    "Application information"
+provisioning_jobs_in_flight = Gauge(
+    "provisioning_jobs_in_flight",
+    "Provisioning jobs currently queued or running",
+    [
+        "state"
+    ],
+    multiprocess_mode="livesum"
+)
+
+provisioning_jobs_total = Counter(
+    "provisioning_jobs_total",
+    "Provisioning job submissions and outcomes",
+    [
+        "result"
+    ]
 )
 
-application_info.info({
+provisioning_job_wait_seconds = Histogram(
+    "provisioning_job_wait_seconds",
+    "Time provisioning jobs spent queued before a worker picked them up",
+    buckets=(
+        0.01,
+        0.05,
+        0.1,
+        0.5,
+        1,
+        5,
+        10,
+        30,
+        60
+    )
+)
+
+
+# -----------------------------------
+# Flask app info
+# -----------------------------------
+
+APPLICATION_INFO = {
     "application": "jira-kubernetes-namespace-automation",
     "environment": "production"
-})
+}
+
+if PROMETHEUS_MULTIPROC_DIR:
+
+    # Info metrics are not supported in multiprocess mode,
+    # expose the same application_info_info series as a gauge
+
+    application_info = Gauge(
+        "application_info_info",
+        "Application information",
+        list(APPLICATION_INFO),
+        multiprocess_mode="max"
+    )
+
+    application_info.labels(
+        **APPLICATION_INFO
+    ).set(1)
+
+else:
+
+    application_info = Info(
+        "application_info",
+        "Application information"
+    )
+
+    application_info.info(
+        APPLICATION_INFO
+    )
 
 
 # -----------------------------------
 # Metrics endpoint helper
 # -----------------------------------
 
-def metrics_response():
+def render_metrics():
+    """
+    The exposition of every metric, as bytes.
+    """
+
+    if PROMETHEUS_MULTIPROC_DIR:
+
+        # Aggregate the per-worker files written
+        # by every gunicorn worker process
+
+        registry = CollectorRegistry()
+
+        multiprocess.MultiProcessCollector(
+            registry
+        )
+
+        registry.register(namespace_collector)
+
+        return generate_latest(registry)
+
+    return generate_latest()
+
+
+def accepts_gzip(accept_encoding):
+
+    for part in accept_encoding.split(","):
+
+        coding, _, params = part.partition(";")
+
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+
+        quality = params.replace(" ", "").lower()
+
+        return quality not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+
+    return False
+
+
+def etag_matches(etag, if_none_match):
+
+    # Weak comparison, W/"x" and "x" are the same tag
+
+    tags = [
+        tag.strip().removeprefix("W/")
+        for tag in if_none_match.split(",")
+    ]
+
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+# -----------------------------------
+# Cached exposition
+# -----------------------------------
+
+SNAPSHOT_AGE = (
+    "# HELP metrics_snapshot_age_seconds Seconds since the served /metrics snapshot was rendered\n"
+    "# TYPE metrics_snapshot_age_seconds gauge\n"
+    "metrics_snapshot_age_seconds {age:.3f}\n"
+)
+
+
+class MetricsCache:
+    """
+    /metrics exposition rendered by a background thread every
+    ``interval`` seconds, so scrapes serve bytes instead of walking the
+    registry on the request thread.
+
+    Each snapshot keeps the plain and gzip bodies and a weak ETag. The
+    staleness gauge metrics_snapshot_age_seconds is appended per
+    response, as a second gzip member when compressed, so it reads the
+    age at scrape time without touching the cached bodies.
+
+    The thread starts lazily in the process serving the first scrape,
+    threads started before gunicorn forks would not exist in workers.
+    """
+
+    def __init__(self, interval):
+
+        self.interval = interval
+        self.snapshot = None
+        self.lock = threading.Lock()
+        self.pid = None
+
+    def _ensure_started(self):
+
+        if self.pid == os.getpid():
+            return
+
+        with self.lock:
+
+            if self.pid == os.getpid():
+                return
+
+            self.refresh()
+
+            threading.Thread(
+                target=self._run,
+                name="metrics-render",
+                daemon=True
+            ).start()
+
+            self.pid = os.getpid()
+
+    def refresh(self):
+
+        rendered_at = time.time()
+
+        data = render_metrics()
+
+        self.snapshot = {
+            "data": data,
+            "gzip": gzip.compress(
+                data,
+                compresslevel=6,
+                mtime=0
+            ),
+            "etag": f'W/"{hashlib.blake2b(data, digest_size=16).hexdigest()}"',
+            "rendered_at": rendered_at
+        }
+
+    def _run(self):
+
+        while True:
+
+            time.sleep(self.interval)
+
+            try:
+
+                self.refresh()
+
+            except Exception as e:
+
+                logger.exception(e)
+
+    def response(self, accept_encoding="", if_none_match=""):
+
+        self._ensure_started()
+
+        snapshot = self.snapshot
+
+        headers = {
+            "Content-Type": CONTENT_TYPE_LATEST,
+            "ETag": snapshot["etag"],
+            "Vary": "Accept-Encoding"
+        }
+
+        if if_none_match and etag_matches(snapshot["etag"], if_none_match):
+
+            return (
+                b"",
+                304,
+                headers
+            )
+
+        age = SNAPSHOT_AGE.format(
+            age=time.time() - snapshot["rendered_at"]
+        ).encode()
+
+        if accepts_gzip(accept_encoding):
+
+            headers["Content-Encoding"] = "gzip"
+
+            return (
+                snapshot["gzip"] + gzip.compress(age, mtime=0),
+                200,
+                headers
+            )
+
+        return (
+            snapshot["data"] + age,
+            200,
+            headers
+        )
+
+
+metrics_cache = MetricsCache(
+    METRICS_CACHE_SECONDS
+)
+
+
+def metrics_response(accept_encoding="", if_none_match=""):
+
+    if METRICS_CACHE_SECONDS > 0:
+
+        return metrics_cache.response(
+            accept_encoding,
+            if_none_match
+        )
 
     return (
-        generate_latest(),
+        render_metrics(),
         200,
         {
             "Content-Type": CONTENT_TYPE_LATEST
         }
-    )
\ No newline at end of file
+    )
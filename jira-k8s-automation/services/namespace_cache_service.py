@@ -0,0 +1,336 @@
+import os
+import time
+import threading
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+from services.logger_service import logger
+
+from services.kubernetes_service import (
+    core_api,
+    get_namespace_labels,
+    find_namespace_by_request,
+    list_provisioned_namespaces,
+    provisioned_record,
+    timestamp
+)
+
+from services.metrics_service import (
+    namespace_cache_synced,
+    namespace_cache_size,
+    namespace_cache_watch_restarts_total
+)
+
+
+# -----------------------------------
+# Namespace cache
+# -----------------------------------
+
+class NamespaceCache:
+    """
+    Local copy of the cluster's namespace names and labels.
+
+    Namespaces are listed once, then followed with a watch that resumes
+    from the last seen resourceVersion. A 410 Gone relists. Until the
+    first list succeeded (or while disabled) lookups fall back to the
+    API server. The cache may lag by a few events, so it only answers
+    "does it exist", the 409 from create stays authoritative.
+
+    Provisioned namespaces are also kept ``retention`` seconds after
+    they were deleted, for namespace_info.
+
+    The watch thread starts lazily per process, like the job queue.
+    """
+
+    def __init__(
+        self,
+        enabled=True,
+        timeout=300,
+        retention=604800
+    ):
+
+        self.enabled = enabled
+        self.timeout = timeout
+        self.retention = retention
+        self.namespaces = {}
+        self.provisioned = {}
+        self.resource_version = None
+        self.synced = False
+        self.lock = threading.Lock()
+        self.pid = None
+
+    # --------------------------------
+    # Lifecycle
+    # --------------------------------
+
+    def start(self):
+
+        if not self.enabled or self.pid == os.getpid():
+            return
+
+        with self.lock:
+
+            if self.pid == os.getpid():
+                return
+
+            self.pid = os.getpid()
+
+            # A copy inherited from the gunicorn master
+            # is not followed by any watch in this process
+
+            self.namespaces = {}
+            self.provisioned = {}
+            self.resource_version = None
+            self.synced = False
+
+        try:
+
+            self._list()
+
+        except Exception as e:
+
+            logger.warning(
+                f"Initial namespace list failed: {e}"
+            )
+
+        threading.Thread(
+            target=self._run,
+            name="namespace-watch",
+            daemon=True
+        ).start()
+
+    def _list(self):
+
+        result = core_api.list_namespace()
+
+        namespaces = {
+            ns.metadata.name: ns.metadata.labels or {}
+            for ns in result.items
+        }
+
+        provisioned = {
+            ns.metadata.name: provisioned_record(
+                ns.metadata.name,
+                ns.metadata.labels,
+                ns.metadata.annotations,
+                ns.metadata.creation_timestamp
+            )
+            for ns in result.items
+            if "request_number" in (ns.metadata.labels or {})
+        }
+
+        with self.lock:
+
+            # Gone since the previous list, the
+            # DELETED event was missed
+
+            for name, record in self.provisioned.items():
+
+                if name not in provisioned:
+                    provisioned[name] = dict(
+                        record,
+                        deleted=record["deleted"] or time.time()
+                    )
+
+            self.namespaces = namespaces
+            self.provisioned = provisioned
+            self.resource_version = result.metadata.resource_version
+            self.synced = True
+
+        namespace_cache_synced.set(1)
+
+        namespace_cache_size.set(
+            len(namespaces)
+        )
+
+        logger.info(
+            f"Namespace cache synced: {len(namespaces)} namespaces "
+            f"at resourceVersion {self.resource_version}"
+        )
+
+    def _run(self):
+
+        backoff = 1
+
+        while True:
+
+            reason = "timeout"
+
+            try:
+
+                if self.resource_version is None:
+                    self._list()
+
+                self._watch()
+
+                backoff = 1
+
+            except ApiException as e:
+
+                if e.status == 410:
+
+                    # History compacted past our resourceVersion
+
+                    reason = "expired"
+
+                    with self.lock:
+                        self.resource_version = None
+
+                else:
+
+                    reason = "api_error"
+
+                    logger.warning(
+                        f"Namespace watch failed: {e.status} {e.reason}"
+                    )
+
+            except Exception as e:
+
+                reason = "error"
+
+                logger.warning(
+                    f"Namespace watch failed: {e}"
+                )
+
+            namespace_cache_watch_restarts_total.labels(
+                reason=reason
+            ).inc()
+
+            if reason in ("api_error", "error"):
+
+                if self.resource_version is None:
+
+                    with self.lock:
+                        self.synced = False
+
+                    namespace_cache_synced.set(0)
+
+                time.sleep(backoff)
+
+                backoff = min(backoff * 2, 30)
+
+    def _watch(self):
+
+        stream = watch.Watch().stream(
+            core_api.list_namespace,
+            resource_version=self.resource_version,
+            timeout_seconds=self.timeout,
+            allow_watch_bookmarks=True
+        )
+
+        for event in stream:
+
+            # raw_object is the plain dict for every event
+            # type, BOOKMARKs are not deserialized at all
+
+            event_type = event["type"]
+            metadata = event["raw_object"].get("metadata", {})
+            name = metadata.get("name")
+            labels = metadata.get("labels") or {}
+
+            with self.lock:
+
+                if event_type == "DELETED":
+
+                    self.namespaces.pop(name, None)
+
+                    record = self.provisioned.get(name)
+
+                    if record is not None:
+                        self.provisioned[name] = dict(
+                            record,
+                            deleted=(
+                                timestamp(metadata.get("deletionTimestamp"))
+                                or time.time()
+                            )
+                        )
+
+                elif event_type in ("ADDED", "MODIFIED"):
+
+                    self.namespaces[name] = labels
+
+                    if "request_number" in labels:
+                        self.provisioned[name] = provisioned_record(
+                            name,
+                            labels,
+                            metadata.get("annotations"),
+                            metadata.get("creationTimestamp")
+                        )
+
+                    else:
+                        self.provisioned.pop(name, None)
+
+                self.resource_version = metadata.get(
+                    "resourceVersion",
+                    self.resource_version
+                )
+
+                size = len(self.namespaces)
+
+            namespace_cache_size.set(size)
+
+    # --------------------------------
+    # Lookups
+    # --------------------------------
+
+    def labels(self, name: str):
+        """
+        Labels of namespace ``name``, None when it does not exist.
+        """
+
+        self.start()
+
+        with self.lock:
+
+            if self.synced:
+                return self.namespaces.get(name)
+
+        return get_namespace_labels(name)
+
+    def find_by_request(self, request_number: str):
+        """
+        Name of the namespace provisioned for a Jira issue, if any.
+        """
+
+        self.start()
+
+        with self.lock:
+
+            if self.synced:
+
+                for name, labels in self.namespaces.items():
+                    if labels.get("request_number") == request_number:
+                        return name
+
+                return None
+
+        return find_namespace_by_request(request_number)
+
+    def provisioned_namespaces(self):
+        """
+        Namespaces carrying a request_number, for namespace_info,
+        including those deleted less than ``retention`` seconds ago.
+        """
+
+        self.start()
+
+        cutoff = time.time() - self.retention
+
+        with self.lock:
+
+            if self.synced:
+
+                expired = [
+                    name
+                    for name, record in self.provisioned.items()
+                    if record["deleted"] is not None
+                    and record["deleted"] < cutoff
+                ]
+
+                for name in expired:
+                    del self.provisioned[name]
+
+                return list(self.provisioned.values())
+
+        return list_provisioned_namespaces()
@@ -1,17 +1,41 @@
 import re
 
-from jinja2 import (
-    Environment,
-    FileSystemLoader
+from config import (
+    TEAM_PREFIXES,
+    TEMPLATE_DIR,
+    TEMPLATE_RELOAD_SECONDS,
+    NAMESPACE_OBJECTS,
+    NAMESPACE_ROLE,
+    NAMESPACE_RESOURCE_QUOTA,
+    NAMESPACE_LIMIT_RANGE,
+    NAMESPACE_INGRESS_NAMESPACES
 )
 
-from config import TEAM_PREFIXES
+from services.template_service import TemplateSet
 
 
-env = Environment(
-    loader=FileSystemLoader("templates"),
-    trim_blocks=True,
-    lstrip_blocks=True
+# Templates of objects Kyverno generates from the namespace
+# labels, or that were never created, only applied when
+# listed in NAMESPACE_OBJECTS
+
+OPTIONAL_TEMPLATES = (
+    "resourcequota",
+    "limitrange",
+    "rolebinding",
+    "networkpolicy"
+)
+
+# Compiled at import, gunicorn workers
+# fork with the templates already loaded
+
+templates = TemplateSet(
+    TEMPLATE_DIR,
+    check_interval=TEMPLATE_RELOAD_SECONDS,
+    exclude=[
+        name
+        for name in OPTIONAL_TEMPLATES
+        if name not in NAMESPACE_OBJECTS
+    ]
 )
 
 
@@ -72,20 +96,26 @@ def render_namespace_manifest(
     project: str,
     app: str,
     site: str,
-    request_number: str
+    request_number: str,
+    creator: str,
+    approved_by: str
 ):
+    """
+    The Namespace and the objects created in it, as dicts.
+    """
 
-    template = env.get_template(
-        "namespace.yaml.j2"
-    )
-
-    rendered = template.render(
+    return templates.render(
         namespace=namespace,
         team=team,
         project=project,
         app=app,
         site=site,
-        request_number=request_number
-    )
-
-    return rendered
\ No newline at end of file
+        request_number=request_number,
+        creator=creator,
+        approved_by=approved_by,
+        namespace_objects=NAMESPACE_OBJECTS,
+        namespace_role=NAMESPACE_ROLE,
+        resource_quota=NAMESPACE_RESOURCE_QUOTA,
+        limit_range=NAMESPACE_LIMIT_RANGE,
+        ingress_namespaces=NAMESPACE_INGRESS_NAMESPACES
+    )
\ No newline at end of file
@@ -0,0 +1,225 @@
+import os
+import re
+import time
+import threading
+
+import yaml
+
+from jinja2 import (
+    Environment,
+    StrictUndefined,
+    UndefinedError
+)
+
+from services.logger_service import logger
+
+
+env = Environment(
+    undefined=StrictUndefined
+)
+
+# A scalar that is a single {{ expression }} keeps the
+# expression's type, e.g. a dict from config for spec.hard
+
+EXPRESSION_RE = re.compile(
+    r"^\{\{((?:(?!\}\}).)*)\}\}$",
+    re.DOTALL
+)
+
+# Plain names and dotted paths, looked up
+# directly instead of through Jinja
+
+PATH_RE = re.compile(
+    r"^\s*([A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*)\s*$"
+)
+
+
+def compile_path(path):
+
+    keys = path.split(".")
+
+    def lookup(context):
+
+        value = context
+
+        for key in keys:
+
+            try:
+                value = value[key]
+
+            except (KeyError, TypeError):
+                raise UndefinedError(
+                    f"'{path}' is undefined"
+                )
+
+        return value
+
+    return lookup
+
+
+# -----------------------------------
+# Compile
+# -----------------------------------
+
+def compile_node(node):
+    """
+    Turn a parsed YAML document into a function of the render context
+    returning a fresh copy with every Jinja string evaluated.
+    """
+
+    if isinstance(node, dict):
+
+        items = [
+            (compile_node(key), compile_node(value))
+            for key, value in node.items()
+        ]
+
+        return lambda context: {
+            key(context): value(context)
+            for key, value in items
+        }
+
+    if isinstance(node, list):
+
+        items = [
+            compile_node(value)
+            for value in node
+        ]
+
+        return lambda context: [
+            item(context)
+            for item in items
+        ]
+
+    if isinstance(node, str) and ("{{" in node or "{%" in node):
+
+        match = EXPRESSION_RE.match(node.strip())
+
+        if match and PATH_RE.match(match.group(1)):
+            return compile_path(match.group(1).strip())
+
+        if match:
+
+            expression = env.compile_expression(
+                match.group(1),
+                undefined_to_none=False
+            )
+
+            return lambda context: expression(**context)
+
+        template = env.from_string(node)
+
+        return lambda context: template.render(context)
+
+    return lambda context: node
+
+
+# -----------------------------------
+# Template set
+# -----------------------------------
+
+class TemplateSet:
+    """
+    Manifest templates of a directory, parsed and compiled once.
+
+    Templates are YAML documents with Jinja only inside string values,
+    so ``name: "{{ namespace }}"`` must be quoted. The YAML is parsed
+    when a file is loaded, rendering only evaluates the compiled Jinja
+    and returns plain dicts, one per document of every ``*.yaml.j2``
+    file but those named in ``exclude`` (without ``.yaml.j2``). Files
+    are checked for changes at most every ``check_interval`` seconds. A
+    file that fails to load keeps the previous version of the set.
+    """
+
+    def __init__(
+        self,
+        directory,
+        check_interval=5,
+        exclude=()
+    ):
+
+        self.directory = directory
+        self.check_interval = check_interval
+        self.exclude = {
+            f"{name}.yaml.j2"
+            for name in exclude
+        }
+        self.documents = []
+        self.mtimes = None
+        self.checked_at = 0
+        self.lock = threading.Lock()
+
+        self.reload()
+
+    def _scan(self):
+
+        return {
+            entry.name: entry.stat().st_mtime_ns
+            for entry in os.scandir(self.directory)
+            if entry.name.endswith(".yaml.j2")
+            and entry.name not in self.exclude
+        }
+
+    def reload(self):
+        """
+        Compile the templates again if a file changed, was added or removed.
+        """
+
+        mtimes = self._scan()
+
+        self.checked_at = time.monotonic()
+
+        if mtimes == self.mtimes:
+            return
+
+        documents = []
+
+        for name in sorted(mtimes):
+
+            path = os.path.join(
+                self.directory,
+                name
+            )
+
+            with open(path, encoding="utf-8") as f:
+                docs = list(yaml.safe_load_all(f))
+
+            for doc in docs:
+
+                if doc:
+                    documents.append(
+                        compile_node(doc)
+                    )
+
+        self.documents = documents
+        self.mtimes = mtimes
+
+        logger.info(
+            f"Compiled {len(documents)} manifest templates "
+            f"from {self.directory}"
+        )
+
+    def render(self, **context):
+        """
+        Every document of the set rendered with ``context``.
+        """
+
+        if time.monotonic() - self.checked_at >= self.check_interval:
+
+            with self.lock:
+
+                try:
+
+                    self.reload()
+
+                except Exception as e:
+
+                    if not self.documents:
+                        raise
+
+                    logger.exception(e)
+
+        return [
+            document(context)
+            for document in self.documents
+        ]